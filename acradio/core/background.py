@@ -1,9 +1,22 @@
-import itertools
-from collections.abc import Sequence
-from arcade import Rect, LRBT
+from abc import ABC, abstractmethod
+from collections.abc import Mapping, Sequence
+from weakref import WeakKeyDictionary
+
+import numpy as np
+import numpy.typing as npt
+from arcade import ArcadeContext, Rect, get_window
+from arcade.gl import Framebuffer, Texture2D
 from arcade.types import Color
 
-from acradio.lib.draw_grad_rect import draw_rect_gradient
+from acradio.lib.blit import blit_texture
+from acradio.lib.draw_grad_rect import (
+    CompiledGradient,
+    compile_gradient,
+    draw_rect_compiled_gradient,
+    draw_rect_timeline_gradient,
+    sample_gradient
+)
+from acradio.lib.oklab import oklab_to_srgb
 
 # https://www.figma.com/community/file/967898387862224533
 gradients = {
@@ -35,16 +48,138 @@ gradients = {
 
 type StoppedGradient = Sequence[tuple[float, int]]
 
-class GradientRect:
-    def __init__(self, rect: Rect, gradient: StoppedGradient):
-        self.rect = rect
-        self.gradient = gradient
+def compile_stopped_gradient(gradient: StoppedGradient) -> CompiledGradient:
+    return compile_gradient([(position, Color.from_uint24(color)) for position, color in gradient])
+
+# Compiled once at import so nothing converts colors per frame
+compiled_gradients = {hour: compile_stopped_gradient(gradient) for hour, gradient in gradients.items()}
+
+MINUTES_PER_DAY = 24 * 60
+TIMELINE_SAMPLES = 256
+
+def build_sky_timeline(hourly: Mapping[int, CompiledGradient], samples: int = TIMELINE_SAMPLES) -> npt.NDArray[np.uint8]:
+    """Bake the hourly gradients into one sRGB gradient per minute of the day.
+
+    Each minute blends from its hour's gradient towards the next hour's in Oklab,
+    wrapping from 23:59 back to 00:00.
+
+    Returns:
+        RGBA8 array of shape ``(MINUTES_PER_DAY, samples, 4)``; rows are minutes.
+    """
+    positions = np.linspace(0.0, 1.0, samples, dtype=np.float32)
+    hours = np.stack([sample_gradient(hourly[hour], positions) for hour in range(24)])
+
+    minutes = np.arange(MINUTES_PER_DAY)
+    start = hours[minutes // 60]
+    end = hours[(minutes // 60 + 1) % 24]
+    progress = ((minutes % 60) / 60)[:, None, None]
+    lab = start + (end - start) * progress
+
+    rgba = np.empty_like(lab)
+    rgba[..., :3] = oklab_to_srgb(lab[..., :3])
+    rgba[..., 3] = np.clip(lab[..., 3], 0.0, 1.0)
+    return np.rint(rgba * 255).astype(np.uint8)
+
+# Baked once at import; the texture itself is uploaded on first draw
+sky_timeline = build_sky_timeline(compiled_gradients)
+
+_timeline_textures: WeakKeyDictionary[ArcadeContext, Texture2D] = WeakKeyDictionary()
+
+def get_sky_timeline_texture(ctx: ArcadeContext) -> Texture2D:
+    texture = _timeline_textures.get(ctx)
+    if texture is None:
+        texture = ctx.texture(
+            (sky_timeline.shape[1], sky_timeline.shape[0]), components=4, data=sky_timeline.tobytes(),
+            filter=(ctx.LINEAR, ctx.LINEAR), wrap_x=ctx.CLAMP_TO_EDGE, wrap_y=ctx.REPEAT
+        )
+        _timeline_textures[ctx] = texture
+    return texture
+
+class CachedRect(ABC):
+    """A rect that renders into an offscreen texture once and blits it until something changes.
+
+    Subclasses implement `draw_uncached`. Setting `rect`, resizing the window or
+    calling `invalidate` marks the cache dirty.
+    """
+    def __init__(self, rect: Rect):
+        self._rect = rect
+        self._framebuffer: Framebuffer | None = None
+        self.dirty = True
+
+    @property
+    def rect(self) -> Rect:
+        return self._rect
+
+    @rect.setter
+    def rect(self, rect: Rect) -> None:
+        if rect != self._rect:
+            self._rect = rect
+            self.dirty = True
+
+    def invalidate(self) -> None:
+        self.dirty = True
+
+    @abstractmethod
+    def draw_uncached(self) -> None:
+        ...
+
+    def _render(self, size: tuple[int, int]) -> None:
+        ctx = get_window().ctx
+        if self._framebuffer is None or self._framebuffer.size != size:
+            self._framebuffer = ctx.framebuffer(color_attachments=[ctx.texture(size, components=4)])
+
+        with self._framebuffer.activate() as fbo:
+            fbo.clear()
+            self.draw_uncached()
+        self.dirty = False
 
     def draw(self) -> None:
-        for a, b in itertools.pairwise(self.gradient):
-            draw_rect_gradient(
-                LRBT(self.rect.left, self.rect.right,
-                     self.rect.bottom + (self.rect.height * (1 - b[0])),
-                     self.rect.bottom + (self.rect.height * (1 - a[0]))),
-                     Color.from_uint24(a[1]), Color.from_uint24(b[1])
-            )
+        size = get_window().get_framebuffer_size()
+        if self.dirty or self._framebuffer is None or self._framebuffer.size != size:
+            self._render(size)
+        blit_texture(self._framebuffer.color_attachments[0])
+
+class GradientRect(CachedRect):
+    """A rect filled with a fixed multi-stop gradient."""
+    def __init__(self, rect: Rect, gradient: StoppedGradient | CompiledGradient):
+        super().__init__(rect)
+        self._gradient = self._compile(gradient)
+
+    @staticmethod
+    def _compile(gradient: StoppedGradient | CompiledGradient) -> CompiledGradient:
+        return gradient if isinstance(gradient, CompiledGradient) else compile_stopped_gradient(gradient)
+
+    @property
+    def gradient(self) -> CompiledGradient:
+        return self._gradient
+
+    @gradient.setter
+    def gradient(self, gradient: StoppedGradient | CompiledGradient) -> None:
+        gradient = self._compile(gradient)
+        if gradient is not self._gradient:
+            self._gradient = gradient
+            self.dirty = True
+
+    def draw_uncached(self) -> None:
+        draw_rect_compiled_gradient(self._rect, self._gradient)
+
+class SkyRect(CachedRect):
+    """A rect filled with the sky for a minute of the day, looked up from `sky_timeline`."""
+    def __init__(self, rect: Rect, minute: int = 0):
+        super().__init__(rect)
+        self._minute = minute
+
+    @property
+    def minute(self) -> int:
+        """Minutes since midnight."""
+        return self._minute
+
+    @minute.setter
+    def minute(self, minute: int) -> None:
+        if minute != self._minute:
+            self._minute = minute
+            self.dirty = True
+
+    def draw_uncached(self) -> None:
+        texture = get_sky_timeline_texture(get_window().ctx)
+        draw_rect_timeline_gradient(self._rect, texture, self._minute)
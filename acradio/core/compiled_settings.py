@@ -0,0 +1,153 @@
+"""A compiled binary form of settings.json for very large track tables.
+
+The cache file sits next to settings.json and looks like::
+
+    header   magic, version, source mtime/size/hash, counts
+    records  one fixed-size struct per track
+    strings  NUL-separated UTF-8 blob, each distinct string stored once
+    extras   the rest of settings.json (everything but "music") as JSON
+
+It's memory-mapped and unpacked with `struct`, so JSON is only parsed when the
+source file actually changed. A changed mtime with identical contents (e.g. a
+`touch`) is caught by the hash and just refreshes the header.
+"""
+import hashlib
+import json
+import mmap
+from pathlib import Path
+import struct
+
+from acradio.core.music import FileJSON, Requirements, parse_tracks
+from acradio.lib.files import atomic_write
+
+__all__ = (
+    'compile_settings',
+    'load_settings'
+)
+
+MAGIC = b"ACRS"
+VERSION = 1
+
+# magic, version, source mtime_ns, source size, source digest, tracks, string blob length, extras length
+_HEADER = struct.Struct("<4sHxxqq16sIII")
+# name id, weather id (-1 = any), month, day, time, priority, flags
+_RECORD = struct.Struct("<Iihhiib3x")
+
+_HAS_MONTH = 1
+_HAS_DAY = 2
+_HAS_TIME = 4
+
+_KNOWN_KEYS = frozenset(("month", "day", "time", "weather", "priority"))
+
+
+def _digest(data: bytes) -> bytes:
+    return hashlib.blake2b(data, digest_size = 16).digest()
+
+
+def compile_settings(settings: FileJSON, source: bytes, mtime_ns: int) -> bytes | None:
+    """Pack parsed settings into the compiled form, or `None` if the track table can't be represented."""
+    strings: dict[str, int] = {}
+
+    def intern(s: str) -> int:
+        if "\0" in s:
+            raise ValueError(s)
+        return strings.setdefault(s, len(strings))
+
+    records = bytearray()
+    for track, req in settings["music"].items():
+        # bool is an int too, but packing one would hand back 1 instead of true
+        if not req.keys() <= _KNOWN_KEYS or not all(type(req.get(k, 0)) is int for k in ("month", "day", "time", "priority")):
+            return None
+        weather = req.get("weather")
+        if weather is not None and not isinstance(weather, str):
+            return None
+        flags = ("month" in req) * _HAS_MONTH | ("day" in req) * _HAS_DAY | ("time" in req) * _HAS_TIME
+        try:
+            records += _RECORD.pack(
+                intern(track), -1 if weather is None else intern(weather),
+                req.get("month", 0), req.get("day", 0), req.get("time", 0), req["priority"], flags
+            )
+        except (struct.error, ValueError):
+            return None
+
+    blob = "\0".join(strings).encode()
+    extras = json.dumps({k: v for k, v in settings.items() if k != "music"}).encode()
+    header = _HEADER.pack(MAGIC, VERSION, mtime_ns, len(source), _digest(source), len(settings["music"]), len(blob), len(extras))
+    return b"".join((header, records, blob, extras))
+
+
+def _unpack(buffer: memoryview) -> FileJSON:
+    _, _, _, _, _, track_count, blob_length, extras_length = _HEADER.unpack_from(buffer)
+
+    records_start = _HEADER.size
+    blob_start = records_start + track_count * _RECORD.size
+    extras_start = blob_start + blob_length
+
+    strings = str(buffer[blob_start:extras_start], "utf-8").split("\0")
+
+    music: dict[str, Requirements] = {}
+    for name, weather, month, day, time, priority, flags in _RECORD.iter_unpack(buffer[records_start:blob_start]):
+        req: Requirements = {"priority": priority}
+        if flags & _HAS_MONTH:
+            req["month"] = month
+        if flags & _HAS_DAY:
+            req["day"] = day
+        if flags & _HAS_TIME:
+            req["time"] = time
+        if weather >= 0:
+            req["weather"] = strings[weather]
+        music[strings[name]] = req
+
+    settings = json.loads(bytes(buffer[extras_start:extras_start + extras_length]))
+    settings["music"] = music
+    return settings
+
+
+def _read_compiled(source_path: Path, cache_path: Path) -> FileJSON | None:
+    try:
+        stat = source_path.stat()
+        with open(cache_path, "rb") as f, mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ) as mm:
+            with memoryview(mm) as buffer:
+                if len(buffer) < _HEADER.size:
+                    return None
+                magic, version, mtime_ns, size, digest, *_ = _HEADER.unpack_from(buffer)
+                if magic != MAGIC or version != VERSION:
+                    return None
+                if (mtime_ns, size) != (stat.st_mtime_ns, stat.st_size):
+                    # Touched but maybe not changed; only the hash can tell
+                    if size != stat.st_size or _digest(source_path.read_bytes()) != digest:
+                        return None
+                    _refresh_header(cache_path, stat.st_mtime_ns)
+                return _unpack(buffer)
+    except (OSError, ValueError, struct.error):
+        return None
+
+
+def _refresh_header(cache_path: Path, mtime_ns: int) -> None:
+    with open(cache_path, "r+b") as f:
+        f.seek(struct.calcsize("<4sHxx"))
+        f.write(struct.pack("<q", mtime_ns))
+
+
+def load_settings(source_path: Path, cache_path: Path) -> FileJSON:
+    """Load settings.json, going through the compiled cache when it's up to date.
+
+    When it isn't, the JSON is parsed and the cache rewritten. Failing to write
+    the cache isn't an error; the next start just parses the JSON again.
+    """
+    settings = _read_compiled(source_path, cache_path)
+    if settings is not None:
+        return settings
+
+    stat = source_path.stat()
+    source = source_path.read_bytes()
+    settings: FileJSON = json.loads(source)
+    parse_tracks(settings["music"])
+
+    compiled = compile_settings(settings, source, stat.st_mtime_ns)
+    if compiled is not None:
+        try:
+            atomic_write(cache_path, compiled)
+        except OSError:
+            pass
+    return settings
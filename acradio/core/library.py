@@ -0,0 +1,200 @@
+"""An on-disk index of what's actually in the music folder.
+
+`LibraryIndex.scan` walks `paths.music_path`, probes every audio file it hasn't
+seen before (or that changed size or mtime) on a process pool, and saves the
+results as JSON. Settings are checked against it at load time, so a track that
+points at a missing or undecodable file is caught then rather than when it's due
+to play, and durations and formats are known without opening anything.
+"""
+import json
+import multiprocessing
+import os
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import NamedTuple
+
+from acradio.lib import paths
+from acradio.lib.files import atomic_write
+
+__all__ = (
+    'AUDIO_EXTENSIONS',
+    'TrackInfo',
+    'ScanResult',
+    'walk_audio',
+    'probe',
+    'process_pool',
+    'LibraryIndex'
+)
+
+AUDIO_EXTENSIONS = frozenset((".mp3", ".ogg", ".wav", ".flac", ".opus", ".m4a"))
+
+VERSION = 1
+# Below this many files the pool costs more to start than it saves
+_POOL_THRESHOLD = 4
+
+
+def walk_audio(root: Path) -> Iterator[tuple[str, os.stat_result]]:
+    """Every audio file under `root`, as its path relative to `root` and its stat."""
+    for directory, _, files in os.walk(root):
+        for file in files:
+            full = Path(directory) / file
+            if full.suffix.lower() not in AUDIO_EXTENSIONS:
+                continue
+            try:
+                yield full.relative_to(root).as_posix(), full.stat()
+            except OSError:
+                continue
+
+
+class TrackInfo(NamedTuple):
+    size: int
+    mtime_ns: int
+    duration: float | None = None
+    sample_rate: int = 0
+    channels: int = 0
+    sample_size: int = 0
+    codec: str = ""
+    error: str | None = None
+
+    @property
+    def playable(self) -> bool:
+        return self.error is None
+
+    @property
+    def pcm_bytes(self) -> int:
+        """Size of the fully decoded audio, or 0 if it isn't known."""
+        if self.duration is None:
+            return 0
+        return int(self.duration * self.sample_rate * self.channels * self.sample_size // 8)
+
+
+class ScanResult(NamedTuple):
+    probed: int
+    reused: int
+    removed: int
+    failed: int
+
+
+def probe(path: str, size: int, mtime_ns: int) -> TrackInfo:
+    """Open `path` just far enough to read its format. Runs in the scan's worker processes."""
+    from pyglet.media import load
+
+    try:
+        source = load(path, streaming = True)
+    # Decoders raise all sorts on bad files (wave.Error, EOFError, struct.error...), and one bad file mustn't stop the scan
+    except Exception as e:  # noqa: BLE001
+        return TrackInfo(size, mtime_ns, error = f"{type(e).__name__}: {e}")
+    try:
+        fmt = source.audio_format
+        if fmt is None:
+            return TrackInfo(size, mtime_ns, error = "no audio track")
+        codec = type(source).__module__.rsplit(".", 1)[-1]
+        return TrackInfo(size, mtime_ns, source.duration, fmt.sample_rate, fmt.channels, fmt.sample_size, codec)
+    finally:
+        source.delete()
+
+
+def process_pool(workers: int | None = None, initializer: Callable[..., object] | None = None,
+                 initargs: tuple = ()) -> ProcessPoolExecutor:
+    """A pool of `workers` processes for probing or transcoding, each running `initializer(*initargs)` first.
+
+    They're spawned rather than forked, since the parent has audio and GL threads running.
+    """
+    return ProcessPoolExecutor(max_workers = workers, mp_context = multiprocessing.get_context("spawn"),
+                               initializer = initializer, initargs = initargs)
+
+
+class LibraryIndex:
+    """Probed metadata for every audio file under `root`, keyed by its path relative to `root`.
+
+    Entries are reused across scans for as long as the file's size and mtime
+    match, so after the first scan only new or edited files are opened.
+
+    `source`, if given, maps a file that's actually played (e.g. a transcoded
+    copy) back to the music file it came from, so lookups by either one hit.
+
+    Durations are used for sizing (`TrackInfo.pcm_bytes`, which decides what the
+    decoded audio cache takes) and for display. Prerolling doesn't need them:
+    tracks switch on minute boundaries and loop until then, whatever their length.
+    """
+    def __init__(self, root: Path = paths.music_path, path: Path = paths.library_index_path,
+                 source: Callable[[Path], Path] | None = None) -> None:
+        self.root = root
+        self.path = path
+        self.source = source
+        self.entries: dict[str, TrackInfo] = {}
+        self.scanned = False
+
+    def load(self) -> None:
+        try:
+            j = json.loads(self.path.read_text())
+            if j.get("version") != VERSION:
+                return
+            self.entries = {name: TrackInfo(*fields) for name, fields in j["files"].items()}
+        except (OSError, ValueError, KeyError, TypeError):
+            self.entries = {}
+
+    def save(self) -> None:
+        atomic_write(self.path, json.dumps({"version": VERSION, "files": self.entries}))
+
+    def scan(self, workers: int | None = None) -> ScanResult:
+        """Bring the index up to date with the files on disk, and save it if anything changed."""
+        if not self.scanned and not self.entries:
+            self.load()
+
+        entries: dict[str, TrackInfo] = {}
+        todo: list[tuple[str, int, int]] = []
+        for name, stat in walk_audio(self.root):
+            old = self.entries.get(name)
+            if old is not None and (old.size, old.mtime_ns) == (stat.st_size, stat.st_mtime_ns):
+                entries[name] = old
+            else:
+                todo.append((name, stat.st_size, stat.st_mtime_ns))
+
+        probed: dict[str, TrackInfo] = {}
+        if todo:
+            names, sizes, mtimes = zip(*todo, strict = True)
+            files = [str(self.root / name) for name in names]
+            if len(todo) < _POOL_THRESHOLD:
+                probed = dict(zip(names, map(probe, files, sizes, mtimes), strict = True))
+            else:
+                with process_pool(workers) as pool:
+                    probed = dict(zip(names, pool.map(probe, files, sizes, mtimes, chunksize = 8), strict = True))
+            entries.update(probed)
+
+        removed = len(self.entries.keys() - entries.keys())
+        changed = bool(todo) or bool(removed) or not self.path.exists()
+        self.entries = entries
+        self.scanned = True
+        if changed:
+            try:
+                self.save()
+            except OSError:
+                pass
+        failed = sum(not info.playable for info in probed.values())
+        return ScanResult(len(probed), len(entries) - len(probed), removed, failed)
+
+    def _key(self, file: Path | str) -> str:
+        file = Path(file)
+        if self.source is not None:
+            file = self.source(file)
+        if file.is_absolute() and file.is_relative_to(self.root):
+            file = file.relative_to(self.root)
+        return file.as_posix()
+
+    def get(self, file: Path | str) -> TrackInfo | None:
+        """Info for `file`, given either relative to the music folder or as a full path under it."""
+        return self.entries.get(self._key(file))
+
+    def __contains__(self, file: Path | str) -> bool:
+        info = self.get(file)
+        return info is not None and info.playable
+
+    def duration(self, file: Path | str) -> float | None:
+        info = self.get(file)
+        return None if info is None else info.duration
+
+    def missing(self, files: Iterable[str]) -> list[str]:
+        """Which of `files` (relative to the music folder) aren't there or can't be decoded."""
+        return [file for file in files if file not in self]
@@ -1,4 +1,6 @@
-from dataclasses import dataclass, asdict
+from bisect import bisect_right
+from collections.abc import Callable, Mapping
+from dataclasses import dataclass
 import json
 from pathlib import Path
 from typing import TypedDict, NotRequired
@@ -15,6 +17,10 @@ class Requirements(TypedDict):
 class FileJSON(TypedDict):
     music: dict[str, Requirements]
     location: str
+    decode_ahead: NotRequired[float]
+    crossfade: NotRequired[float]
+    audio_cache_mb: NotRequired[float]
+    pcm_cache_mb: NotRequired[float]
 
 @dataclass
 class State:
@@ -28,35 +34,80 @@ class State:
     def time(self) -> int:
         return self.hour * 100 + self.minute
 
-def load_tracks() -> dict[str, Requirements]:
-    with open(paths.settings_path) as f:
-        j: FileJSON = json.load(f)
-    for v in j["music"].values():
+def parse_tracks(music: dict[str, Requirements]) -> dict[str, Requirements]:
+    for v in music.values():
         if "priority" not in v:
             v["priority"] = 0
-    return j["music"]
+    return music
+
+def load_tracks(path: Path = paths.settings_path) -> dict[str, Requirements]:
+    with open(path) as f:
+        j: FileJSON = json.load(f)
+    return parse_tracks(j["music"])
 
-tracks = load_tracks()
+def track_file(track: str) -> str:
+    """The file for `track`, relative to the music folder."""
+    return track + ".mp3"
 
-def choose_track(state: State) -> Path:
-    state_dict = asdict(state)
+type BucketKey = tuple[int | None, int | None, str | None]
+type SortKey = tuple[int, int, int]
 
-    # Filter to only tracks that match our state
-    possible_tracks: dict[str, Requirements] = {
-        track: req
-        for track, req in tracks.items()
-        if all((state_dict[r] == v for r,v in req.items() if not (r == 'time' or r == 'priority')))
-    }
+class TrackIndex:
+    """A precompiled lookup table for `choose_track`.
 
-    # Cull times too late (lteq)
-    possible_tracks = {t: r for t, r in possible_tracks.items() if r.get("time", 0) <= state.time}
+    Tracks are bucketed on their (month, day, weather) requirements, with `None`
+    standing in for "any". Each bucket keeps its tracks sorted by (time, priority,
+    file order), so a lookup is eight dict hits and a `bisect` each.
 
-    # Sort by time and priority
-    possible_tracks = dict(sorted(possible_tracks.items(), key=lambda item: (item[1]["time"], item[1]["priority"])))
+    Ties resolve the same way the original linear scan did: latest time wins,
+    then highest priority, then whichever track appears last in the settings.
 
-    if not possible_tracks:
-        raise ValueError("No valid track found!")
+    `resolve`, if given, maps each track's file to the one actually played (e.g.
+    its transcoded copy). It's asked on every `path` call, since copies can appear
+    while the app is running.
+    """
+    def __init__(self, tracks: Mapping[str, Requirements], resolve: Callable[[Path], Path] | None = None):
+        buckets: dict[BucketKey, list[tuple[SortKey, str]]] = {}
+        for order, (track, req) in enumerate(tracks.items()):
+            key = (req.get("month"), req.get("day"), req.get("weather"))
+            sort_key = (req.get("time", 0), req.get("priority", 0), order)
+            buckets.setdefault(key, []).append((sort_key, track))
 
-    file = list(possible_tracks.items())[-1][0]
+        self._times: dict[BucketKey, list[int]] = {}
+        self._entries: dict[BucketKey, list[tuple[SortKey, str]]] = {}
+        for key, entries in buckets.items():
+            entries.sort()
+            self._times[key] = [sort_key[0] for sort_key, _ in entries]
+            self._entries[key] = entries
 
-    return paths.music_path / (file + ".mp3")
+        self._paths: dict[str, Path] = {}
+        self.resolve = resolve
+
+    def path(self, track: str) -> Path:
+        """The file for `track`. Built on first use, so huge tables don't pay for paths they never play."""
+        path = self._paths.get(track)
+        if path is None:
+            path = self._paths[track] = paths.music_path / track_file(track)
+        return path if self.resolve is None else self.resolve(path)
+
+    def lookup(self, state: State) -> str | None:
+        """Get the name of the track to play in `state`, or `None` if nothing matches."""
+        time = state.time
+        weather = str(state.weather)
+        best: tuple[SortKey, str] | None = None
+        for month in (state.month, None):
+            for day in (state.day, None):
+                for w in (weather, None):
+                    times = self._times.get((month, day, w))
+                    if times is None:
+                        continue
+                    i = bisect_right(times, time)
+                    if i and (best is None or self._entries[(month, day, w)][i - 1] > best):
+                        best = self._entries[(month, day, w)][i - 1]
+        return None if best is None else best[1]
+
+def choose_track(state: State, index: TrackIndex) -> Path:
+    track = index.lookup(state)
+    if track is None:
+        raise ValueError("No valid track found!")
+    return index.path(track)
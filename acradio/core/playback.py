@@ -0,0 +1,201 @@
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+
+from pyglet.media import Player, Source
+
+from acradio.core.library import LibraryIndex
+from acradio.lib.audio_cache import DecodedAudioCache
+from acradio.lib.pcm import MappedWaveSource
+from acradio.lib.streaming import DEFAULT_DECODE_AHEAD, open_stream
+from acradio.lib.timeline import Timeline
+
+# A track is only decoded into the cache once it's been played this many times
+CACHE_AFTER_PLAYS = 2
+
+
+def _discard(future: Future[Source]) -> None:
+    if not future.cancelled() and future.exception() is None:
+        future.result().delete()
+
+
+class TrackPlayer:
+    """Plays the music track, pre-rolling upcoming tracks on a worker thread and crossfading between them.
+
+    Call `preroll` with the track you expect next; when `play` is later asked for
+    that track, the opened and primed stream is ready and the switch costs no
+    decode on the main thread. Anything else still works, it just opens the
+    file synchronously.
+
+    With a `DecodedAudioCache`, tracks already in the cache play straight from
+    memory. A track that comes around again (`CACHE_AFTER_PLAYS`) is decoded into
+    the cache on a worker of its own, so later visits are free and a long decode
+    never holds up a preroll; one-off tracks only ever stream. A `LibraryIndex` supplies decoded sizes up front, so tracks too big
+    for the cache aren't even queued.
+
+    The crossfade runs on `timeline`. Pass a shared one and step it yourself, or
+    leave it out and `update` steps a private one.
+    """
+    def __init__(self, volume: float = 1.0, crossfade: float = 2.0, decode_ahead: float = DEFAULT_DECODE_AHEAD,
+                 cache: DecodedAudioCache | None = None, library: LibraryIndex | None = None,
+                 timeline: Timeline | None = None) -> None:
+        self._volume = volume
+        self.decode_ahead = decode_ahead
+        self.cache = cache
+        self.library = library
+        self._plays: Counter[Path] = Counter()
+
+        self.track: Path | None = None
+        self.player: Player | None = None
+        self.outgoing: Player | None = None
+
+        self._owns_timeline = timeline is None
+        self.timeline = timeline if timeline is not None else Timeline(2)
+        self.fade_in = self.timeline.envelope(0.0, 1.0, crossfade, float("inf"), 0)
+        self.fade_out = self.timeline.envelope(0.0, 1.0, 0, 0, crossfade)
+        self._crossfade = crossfade
+
+        self._executor = ThreadPoolExecutor(max_workers = 1, thread_name_prefix = "TrackPreroll")
+        self._cache_executor = ThreadPoolExecutor(max_workers = 1, thread_name_prefix = "AudioCacheFill")
+        self._preroll: tuple[Path, Future[Source]] | None = None
+
+    @property
+    def volume(self) -> float:
+        return self._volume
+
+    @volume.setter
+    def volume(self, volume: float) -> None:
+        self._volume = volume
+        self._apply_gain()
+
+    @property
+    def crossfade(self) -> float:
+        """Crossfade length in seconds. Zero switches tracks with a hard cut."""
+        return self._crossfade
+
+    @crossfade.setter
+    def crossfade(self, crossfade: float) -> None:
+        self._crossfade = crossfade
+        self.fade_in.fade_in = crossfade
+        self.fade_out.fade_out = crossfade
+
+    @property
+    def fading(self) -> bool:
+        return self.outgoing is not None
+
+    def _apply_gain(self) -> None:
+        if self.outgoing is not None:
+            self.outgoing.volume = self._volume * self.fade_out.value
+            if self.player is not None:
+                self.player.volume = self._volume * self.fade_in.value
+        elif self.player is not None:
+            self.player.volume = self._volume
+
+    def _open(self, track: Path) -> Source:
+        if self.cache is not None:
+            source = self.cache.get(track)
+            if source is not None:
+                return source
+        return open_stream(track, self.decode_ahead)
+
+    def _open_primed(self, track: Path) -> Source:
+        source = self._open(track)
+        prime = getattr(source, "prime", None)
+        if prime is not None:
+            prime()
+        return source
+
+    def _fill_cache(self, track: Path, source: Source) -> None:
+        # Mapped PCM is already as cheap as the cache would make it
+        if self.cache is None or not self.cache.budget or isinstance(source, MappedWaveSource) or track in self.cache:
+            return
+        self._plays[track] += 1
+        if self._plays[track] < CACHE_AFTER_PLAYS:
+            return
+        info = self.library.get(track) if self.library is not None else None
+        size = info.pcm_bytes if info is not None else 0
+        if size > self.cache.budget:
+            return
+        self._cache_executor.submit(self.cache.decode, track, size)
+
+    def preroll(self, track: Path) -> None:
+        """Start opening `track` in the background, ready for a later `play`."""
+        if track == self.track or (self._preroll is not None and self._preroll[0] == track):
+            return
+        self._drop_preroll()
+        self._preroll = track, self._executor.submit(self._open_primed, track)
+
+    def _drop_preroll(self) -> None:
+        if self._preroll is not None:
+            self._preroll[1].add_done_callback(_discard)
+            self._preroll = None
+
+    def _take_source(self, track: Path) -> Source:
+        if self._preroll is not None and self._preroll[0] == track:
+            future = self._preroll[1]
+            self._preroll = None
+            if future.cancel():
+                # Still queued behind an earlier preroll; opening it here beats waiting for both
+                return self._open(track)
+            try:
+                return future.result()
+            except OSError:
+                pass  # Fall through and let the synchronous open raise something useful
+        else:
+            self._drop_preroll()
+        return self._open(track)
+
+    def play(self, track: Path) -> None:
+        """Switch to `track`, crossfading from whatever is playing. Does nothing if it's already playing."""
+        if track == self.track and self.player is not None:
+            return
+
+        source = self._take_source(track)
+        self.track = track
+
+        previous = self.player
+        self.player = Player()
+        self.player.queue(source)
+        # Looping seeks the source back to the start, so the queue never runs dry and on_player_eos never fires
+        self.player.loop = True
+
+        if previous is not None and self.crossfade > 0:
+            if self.outgoing is not None:
+                self.outgoing.delete()
+            self.outgoing = previous
+            self.fade_in.activate()
+            self.fade_out.activate()
+        elif previous is not None:
+            previous.delete()
+
+        self._apply_gain()
+        self.player.play()
+        self._fill_cache(track, source)
+
+    def update(self, delta_time: float) -> None:
+        if self.outgoing is None:
+            return
+
+        if self._owns_timeline:
+            self.timeline.update(delta_time)
+        if not self.fade_out.active:
+            self.outgoing.delete()
+            self.outgoing = None
+            # Its hold never ends, so take it off the timeline by hand
+            self.fade_in.stop()
+        self._apply_gain()
+
+    def stop(self) -> None:
+        self._drop_preroll()
+        for player in (self.player, self.outgoing):
+            if player is not None:
+                player.delete()
+        self.player = self.outgoing = None
+        self.track = None
+        self.fade_in.stop()
+        self.fade_out.stop()
+
+    def close(self) -> None:
+        self.stop()
+        self._executor.shutdown(wait = False, cancel_futures = True)
+        self._cache_executor.shutdown(wait = False, cancel_futures = True)
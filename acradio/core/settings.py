@@ -0,0 +1,192 @@
+import threading
+from collections.abc import Callable, Mapping
+from dataclasses import dataclass
+from pathlib import Path
+from types import MappingProxyType
+
+import pyglet.clock
+from pyglet.clock import Clock
+
+from acradio.core.compiled_settings import load_settings
+from acradio.core.library import LibraryIndex
+from acradio.core.music import FileJSON, Requirements, TrackIndex, track_file
+from acradio.core.transcode import PCMCache
+from acradio.lib import paths
+from acradio.lib.streaming import DEFAULT_DECODE_AHEAD
+
+__all__ = (
+    'Settings',
+    'SettingsService',
+    'settings_service'
+)
+
+
+@dataclass(frozen = True)
+class Settings:
+    """An immutable snapshot of settings.json."""
+    location: str
+    tracks: Mapping[str, Mapping]
+    track_index: TrackIndex
+    decode_ahead: float = DEFAULT_DECODE_AHEAD
+    crossfade: float = 2.0
+    # Off by default: a decoded track is tens of MB, too much to keep around on small devices
+    audio_cache_mb: float = 0
+    # Off by default too: transcoding a whole library writes gigabytes of PCM
+    pcm_cache_mb: float = 0
+    mtime_ns: int = 0
+    library: LibraryIndex | None = None
+    # Tracks whose files are missing or can't be decoded; they're left out of `track_index`
+    missing_tracks: tuple[str, ...] = ()
+
+    @property
+    def audio_cache_bytes(self) -> int:
+        return int(self.audio_cache_mb * 1024 * 1024)
+
+    @property
+    def pcm_cache_bytes(self) -> int:
+        return int(self.pcm_cache_mb * 1024 * 1024)
+
+
+type SettingsListener = Callable[[Settings, Settings], None]
+
+
+def _freeze(music: dict[str, Requirements]) -> Mapping[str, Mapping]:
+    return MappingProxyType({track: MappingProxyType(dict(req)) for track, req in music.items()})
+
+
+class SettingsService:
+    """The one place settings.json is parsed.
+
+    `snapshot` is loaded on first use and then only replaced when the file's
+    mtime changes (see `check` and `watch`). On reload, parts that didn't change
+    are carried over from the old snapshot; in particular the `TrackIndex` is only
+    rebuilt when the music table differs. Listeners get ``(old, new)`` after each
+    reload.
+
+    Parsing goes through the compiled cache at `cache_path` (see
+    `acradio.core.compiled_settings`), so the JSON itself is only read when it changed.
+
+    With a `LibraryIndex`, the track table is checked against it, so tracks
+    without a playable file never get chosen. Loads use the index as it stands
+    (the one saved last run, at first) and rescan the music folder on a worker
+    thread; when the scan finishes, the next `check` publishes a snapshot checked
+    against the new index. Before any index exists, no track counts as missing.
+    With a `PCMCache`, chosen tracks resolve to their transcoded copies where
+    there is one.
+    """
+    def __init__(self, path: Path = paths.settings_path, cache_path: Path = paths.settings_cache_path,
+                 library: LibraryIndex | None = None, pcm_cache: PCMCache | None = None) -> None:
+        self.path = path
+        self.cache_path = cache_path
+        self.library = library
+        self.pcm_cache = pcm_cache
+        self._snapshot: Settings | None = None
+        self._listeners: list[SettingsListener] = []
+        self._clock: Clock | None = None
+        self._scan: threading.Thread | None = None
+        self._rescanned = threading.Event()
+
+    @property
+    def snapshot(self) -> Settings:
+        if self._snapshot is None:
+            self._snapshot = self._load(None)
+            self._start_scan()
+        return self._snapshot
+
+    def _start_scan(self) -> None:
+        if self.library is None or (self._scan is not None and self._scan.is_alive()):
+            return
+        self._scan = threading.Thread(target = self._run_scan, args = (self.library,), name = "LibraryScan", daemon = True)
+        self._scan.start()
+
+    def _run_scan(self, library: LibraryIndex) -> None:
+        try:
+            library.scan()
+        except OSError:
+            return
+        self._rescanned.set()
+
+    def _missing(self, tracks: Mapping[str, Mapping]) -> tuple[str, ...]:
+        if self.library is None:
+            return ()
+        if not self.library.scanned and not self.library.entries:
+            self.library.load()
+        if not self.library.entries:
+            return ()
+        return tuple(track for track in tracks if track_file(track) not in self.library)
+
+    def _load(self, previous: Settings | None) -> Settings:
+        mtime_ns = self.path.stat().st_mtime_ns
+        j: FileJSON = load_settings(self.path, self.cache_path)
+
+        tracks = _freeze(j["music"])
+        missing = self._missing(tracks)
+
+        if previous is not None and tracks == previous.tracks and missing == previous.missing_tracks:
+            tracks, track_index = previous.tracks, previous.track_index
+        else:
+            skip = set(missing)
+            resolve = self.pcm_cache.resolve if self.pcm_cache is not None else None
+            track_index = TrackIndex({track: req for track, req in tracks.items() if track not in skip}, resolve)
+
+        return Settings(
+            location = j["location"],
+            tracks = tracks,
+            track_index = track_index,
+            decode_ahead = j.get("decode_ahead", DEFAULT_DECODE_AHEAD),
+            crossfade = j.get("crossfade", 2.0),
+            audio_cache_mb = j.get("audio_cache_mb", 0),
+            pcm_cache_mb = j.get("pcm_cache_mb", 0),
+            mtime_ns = mtime_ns,
+            library = self.library,
+            missing_tracks = missing
+        )
+
+    def subscribe(self, listener: SettingsListener) -> None:
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener: SettingsListener) -> None:
+        self._listeners.remove(listener)
+
+    def check(self) -> bool:
+        """Reload if the file changed on disk or a library scan finished. Returns whether a new snapshot was published.
+
+        A file that fails to parse (e.g. caught mid-write) keeps the old snapshot.
+        """
+        previous = self.snapshot
+        rescanned = self._rescanned.is_set()
+        try:
+            changed = self.path.stat().st_mtime_ns != previous.mtime_ns
+            if not changed and not rescanned:
+                return False
+            self._rescanned.clear()
+            snapshot = self._load(previous)
+        except (OSError, ValueError, KeyError):
+            if rescanned:
+                self._rescanned.set()
+            return False
+        if changed:
+            self._start_scan()
+
+        self._snapshot = snapshot
+        for listener in self._listeners:
+            listener(previous, snapshot)
+        return True
+
+    def _tick(self, delta_time: float) -> None:
+        self.check()
+
+    def watch(self, interval: float = 2, clock: Clock | None = None) -> None:
+        """Poll the file's mtime every `interval` seconds on a pyglet clock."""
+        self.unwatch()
+        self._clock = clock or pyglet.clock.get_default()
+        self._clock.schedule_interval(self._tick, interval)
+
+    def unwatch(self) -> None:
+        if self._clock is not None:
+            self._clock.unschedule(self._tick)
+            self._clock = None
+
+
+_pcm_cache = PCMCache()
+settings_service = SettingsService(library = LibraryIndex(source = _pcm_cache.source), pcm_cache = _pcm_cache)
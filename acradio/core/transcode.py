@@ -0,0 +1,182 @@
+"""Offline transcoding of the music folder into plain PCM.
+
+Every audio file under `paths.music_path` gets a decoded copy under
+`paths.pcm_cache_path` as a canonical WAV file, which `MappedWaveSource` plays
+straight from a memory map. A copy is up to date when its mtime matches the
+source's (it's stamped on write), so rebuilding only touches new or edited files.
+
+Run ``python -m acradio.core.transcode`` to build the cache by hand; the app
+also brings it up to date in the background after startup.
+"""
+import argparse
+import ctypes
+import os
+from collections.abc import Iterable
+from pathlib import Path
+from typing import NamedTuple
+
+from acradio.core.library import process_pool, walk_audio
+from acradio.lib import paths
+
+__all__ = (
+    'PCM_SUFFIX',
+    'BuildResult',
+    'transcode',
+    'PCMCache',
+    'default_workers'
+)
+
+PCM_SUFFIX = ".wav"
+# Decode this much per read while transcoding
+_CHUNK_BYTES = 1 << 20
+
+
+class BuildResult(NamedTuple):
+    transcoded: int
+    skipped: int
+    failed: int
+    removed: int
+    # Left untranscoded because the cache reached its budget
+    deferred: int = 0
+
+
+def transcode(source: str, destination: str, mtime_ns: int) -> bool:
+    """Decode `source` into a PCM WAV at `destination`. Runs in the build's worker processes.
+
+    The file is written to a temporary name and renamed into place, then stamped
+    with `mtime_ns` so it reads as up to date. Returns whether it worked; a file
+    that fails leaves nothing behind.
+    """
+    from pyglet.media import load
+
+    from acradio.lib.pcm import write_wav_header
+
+    destination_path = Path(destination)
+    tmp = destination_path.with_suffix(".tmp")
+    decoder = None
+    try:
+        decoder = load(source, streaming = True)
+        if decoder.audio_format is None:
+            return False
+        destination_path.parent.mkdir(parents = True, exist_ok = True)
+        with open(tmp, "wb") as f:
+            write_wav_header(f, decoder.audio_format, 0)
+            written = 0
+            while (data := decoder.get_audio_data(_CHUNK_BYTES)) is not None:
+                f.write(ctypes.string_at(data.pointer, data.length))
+                written += data.length
+            write_wav_header(f, decoder.audio_format, written)
+        tmp.replace(destination_path)
+        os.utime(destination_path, ns = (mtime_ns, mtime_ns))
+        return True
+    # Same as probing: decoders raise all sorts on bad files, and one bad file mustn't stop the build
+    except Exception:  # noqa: BLE001
+        return False
+    finally:
+        tmp.unlink(missing_ok = True)
+        if decoder is not None:
+            decoder.delete()
+
+
+def _lower_priority(nice: int) -> None:
+    # There's no nice on Windows; the workers just run at normal priority there
+    if hasattr(os, "nice"):
+        os.nice(nice)
+
+
+class PCMCache:
+    """Decoded copies of the music folder, and the lookup from a track to its copy."""
+    def __init__(self, root: Path = paths.music_path, cache: Path = paths.pcm_cache_path) -> None:
+        self.root = root
+        self.cache = cache
+
+    def cached_path(self, name: str) -> Path:
+        """Where the copy of `name` (relative to the music folder) lives."""
+        return self.cache / (name + PCM_SUFFIX)
+
+    def resolve(self, path: Path) -> Path:
+        """The up-to-date PCM copy of `path` if there is one, otherwise `path` itself."""
+        if not path.is_relative_to(self.root):
+            return path
+        cached = self.cached_path(path.relative_to(self.root).as_posix())
+        try:
+            if cached.stat().st_mtime_ns == path.stat().st_mtime_ns:
+                return cached
+        except OSError:
+            pass
+        return path
+
+    def source(self, path: Path) -> Path:
+        """The music file `path` is a copy of, or `path` itself if it isn't one. The inverse of `resolve`."""
+        if path.suffix != PCM_SUFFIX or not path.is_relative_to(self.cache):
+            return path
+        return self.root / path.relative_to(self.cache).with_suffix("")
+
+    def build(self, workers: int | None = None, files: Iterable[str] | None = None, *, nice: int = 0,
+              budget: int | None = None) -> BuildResult:
+        """Transcode everything that's missing or stale, and delete copies whose source is gone.
+
+        `files` limits the build to those names (relative to the music folder).
+        The worker processes are `nice`d by `nice`, where the platform allows it.
+        With a `budget` in bytes, transcoding stops once the up-to-date copies add
+        up to it; the copy in progress on each worker can still take it over.
+        """
+        sources = dict(walk_audio(self.root))
+        wanted = sources.keys() if files is None else sources.keys() & set(files)
+
+        todo: list[tuple[str, str, int]] = []
+        used = 0
+        for name in wanted:
+            cached = self.cached_path(name)
+            mtime_ns = sources[name].st_mtime_ns
+            try:
+                stat = cached.stat()
+                if stat.st_mtime_ns == mtime_ns:
+                    used += stat.st_size
+                    continue
+            except OSError:
+                pass
+            todo.append((str(self.root / name), str(cached), mtime_ns))
+
+        ok: list[bool] = []
+        if todo and (budget is None or used < budget):
+            with process_pool(workers, initializer = _lower_priority if nice else None, initargs = (nice,)) as pool:
+                for (_, destination, _), done in zip(todo, pool.map(transcode, *zip(*todo, strict = True)), strict = True):
+                    ok.append(done)
+                    if done and budget is not None:
+                        used += Path(destination).stat().st_size
+                        if used >= budget:
+                            pool.shutdown(cancel_futures = True)
+                            break
+
+        removed = self._prune(sources.keys())
+        return BuildResult(sum(ok), len(wanted) - len(todo), len(ok) - sum(ok), removed, len(todo) - len(ok))
+
+    def _prune(self, names: Iterable[str]) -> int:
+        keep = {self.cached_path(name) for name in names}
+        removed = 0
+        for directory, _, files in os.walk(self.cache):
+            for file in files:
+                path = Path(directory) / file
+                if path not in keep:
+                    path.unlink(missing_ok = True)
+                    removed += 1
+        return removed
+
+
+def default_workers() -> int:
+    """Every core but one, so playback keeps a core to itself while the cache builds."""
+    return max(1, (os.cpu_count() or 2) - 1)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog = "acradio.core.transcode", description = "Transcode the music folder into the PCM cache.")
+    parser.add_argument("--workers", type = int, default = default_workers(), help = "worker processes to use")
+    args = parser.parse_args()
+
+    result = PCMCache().build(args.workers)
+    print(f"{result.transcoded} transcoded, {result.skipped} up to date, {result.failed} failed, {result.removed} removed")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
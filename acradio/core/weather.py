@@ -1,18 +1,33 @@
 import asyncio
+import json
+import queue
+import threading
+import time
+from collections.abc import Awaitable, Callable, Mapping
+from concurrent.futures import Future
 from enum import StrEnum
-import python_weather
-from python_weather.enums import Kind
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from acradio.lib.files import atomic_write
+
+# python_weather (and aiohttp under it) are slow to import, so they're only
+# pulled in when a fetch actually runs, which for WeatherService is on its thread.
+if TYPE_CHECKING:
+    import python_weather
+    from python_weather.enums import Kind
 
 class Weather(StrEnum):
     SUNNY = "sunny"
     RAINY = "rainy"
     SNOWY = "snowy"
 
-async def _get_weather(place: str) -> Weather:
-    client = python_weather.Client()
-    forecast = await client.get(place)
+type WeatherProvider = Callable[[str], Awaitable[Weather]]
 
-    match forecast.kind:
+def map_kind(kind: "Kind") -> Weather:
+    from python_weather.enums import Kind
+
+    match kind:
         case Kind.SUNNY | Kind.PARTLY_CLOUDY | Kind.CLOUDY | Kind.VERY_CLOUDY | Kind.FOG:
             return Weather.SUNNY
         case Kind.LIGHT_SHOWERS | Kind.THUNDERY_SHOWERS | Kind.LIGHT_RAIN | Kind.HEAVY_SHOWERS | Kind.HEAVY_RAIN | Kind.THUNDERY_HEAVY_RAIN:
@@ -22,5 +37,192 @@ async def _get_weather(place: str) -> Weather:
         case _:
             return Weather.SUNNY
 
+async def _get_weather(place: str) -> Weather:
+    import python_weather
+
+    async with python_weather.Client() as client:
+        forecast = await client.get(place)
+    return map_kind(forecast.kind)
+
 def get_weather(place: str) -> Weather:
+    """Fetch the weather, blocking until it arrives. Use `WeatherService` from the render thread."""
     return asyncio.run(_get_weather(place))
+
+
+class PythonWeatherProvider:
+    """Fetches from python_weather, keeping one client session open between calls.
+
+    Must only be awaited on a single event loop, which also owns the session.
+    """
+    def __init__(self) -> None:
+        self.client: python_weather.Client | None = None
+
+    async def __call__(self, place: str) -> Weather:
+        if self.client is None:
+            import python_weather
+            self.client = python_weather.Client()
+        forecast = await self.client.get(place)
+        return map_kind(forecast.kind)
+
+    async def close(self) -> None:
+        if self.client is not None:
+            await self.client.close()
+            self.client = None
+
+
+class StubProvider:
+    """An offline provider that always reports the same weather, optionally after a delay.
+
+    `places` overrides the weather for particular locations.
+    """
+    def __init__(self, weather: Weather = Weather.SUNNY, delay: float = 0, places: Mapping[str, Weather] | None = None) -> None:
+        self.weather = weather
+        self.delay = delay
+        self.places = dict(places or {})
+        self.calls = 0
+
+    async def __call__(self, place: str) -> Weather:
+        self.calls += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        return self.places.get(place, self.weather)
+
+
+class WeatherCache:
+    """A small on-disk TTL cache of the last weather seen per location.
+
+    Stored as JSON: ``{location: {"weather": ..., "timestamp": ...}}``.
+    """
+    def __init__(self, path: Path, ttl: float = 600) -> None:
+        self.path = path
+        self.ttl = ttl
+
+    def _read(self) -> dict[str, dict]:
+        try:
+            return json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            return {}
+
+    def get(self, place: str) -> tuple[Weather, float] | None:
+        """Get the cached weather for `place` and its age in seconds, or `None` if there isn't any."""
+        entry = self._read().get(place)
+        if entry is None:
+            return None
+        try:
+            return Weather(entry["weather"]), time.time() - entry["timestamp"]
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    def store(self, place: str, weather: Weather) -> None:
+        entries = self._read()
+        entries[place] = {"weather": str(weather), "timestamp": time.time()}
+        atomic_write(self.path, json.dumps(entries))
+
+
+class WeatherService:
+    """Fetches weather on a background thread so the render thread never waits on the network.
+
+    The service owns one event loop on a daemon thread and one provider (and so one
+    client session) for its lifetime. `refresh` starts a fetch and returns at once;
+    finished results are handed back through a thread-safe queue and picked up by
+    `poll`. Until a fetch succeeds, `current` keeps serving the last known value.
+
+    The service reports for one `place` at a time. Asking about a different place
+    cancels the fetch in flight, and any result for another place that still
+    arrives is dropped by `poll`.
+
+    With a `WeatherCache`, successful fetches are written to disk (from the
+    background thread) and `load_cached` can seed `current` at startup.
+    """
+    def __init__(self, provider: WeatherProvider | None = None, timeout: float = 10, default: Weather = Weather.SUNNY,
+                 cache: WeatherCache | None = None) -> None:
+        self.provider = provider if provider is not None else PythonWeatherProvider()
+        self.timeout = timeout
+        self.current = default
+        self.cache = cache
+        self.place: str | None = None
+        self.last_error: BaseException | None = None
+
+        self._results: queue.SimpleQueue[tuple[str, Weather | BaseException]] = queue.SimpleQueue()
+        self._pending: Future | None = None
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run, name="WeatherService", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+
+    async def _fetch(self, place: str) -> None:
+        try:
+            weather = await asyncio.wait_for(self.provider(place), self.timeout)
+        except Exception as e:  # noqa: BLE001 -- anything raised here must reach the render thread, not kill the loop
+            self._results.put((place, e))
+        else:
+            self._results.put((place, weather))
+            if self.cache is not None:
+                try:
+                    self.cache.store(place, weather)
+                except OSError as e:
+                    self._results.put((place, e))
+
+    def _switch(self, place: str) -> None:
+        if place != self.place:
+            if self._pending is not None:
+                self._pending.cancel()
+            self.place = place
+
+    def load_cached(self, place: str) -> bool:
+        """Switch to `place` and seed `current` from the disk cache. Returns whether the cached value is still fresh."""
+        self._switch(place)
+        if self.cache is None:
+            return False
+        cached = self.cache.get(place)
+        if cached is None:
+            return False
+        self.current, age = cached
+        return age < self.cache.ttl
+
+    @property
+    def busy(self) -> bool:
+        return self._pending is not None and not self._pending.done()
+
+    def refresh(self, place: str) -> None:
+        """Start fetching the weather for `place`, unless a fetch for it is already running."""
+        self._switch(place)
+        if self.busy or self._loop.is_closed():
+            return
+        self._pending = asyncio.run_coroutine_threadsafe(self._fetch(place), self._loop)
+
+    def poll(self) -> Weather | None:
+        """Apply any finished fetches for the current place. Returns the new weather if one arrived, otherwise `None`.
+
+        Cheap enough to call every frame.
+        """
+        if self._results.empty():
+            return None
+        weather = None
+        while not self._results.empty():
+            place, result = self._results.get_nowait()
+            if place != self.place:
+                continue
+            if isinstance(result, BaseException):
+                self.last_error = result
+            else:
+                self.last_error = None
+                weather = self.current = result
+        return weather
+
+    def close(self, timeout: float = 5) -> None:
+        if self._loop.is_closed():
+            return
+        close = getattr(self.provider, "close", None)
+        if close is not None:
+            try:
+                asyncio.run_coroutine_threadsafe(close(), self._loop).result(timeout)
+            except TimeoutError:
+                pass
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout)
+        if not self._thread.is_alive():
+            self._loop.close()
@@ -1,3 +1,5 @@
+from collections.abc import Callable
+
 from arcade import View as ArcadeView, Window as ArcadeWindow
 # Update these classes if you want custom functionality in your Windows and Views.
 
@@ -11,13 +13,66 @@ __all__ = (
 WINDOW_WIDTH, WINDOW_HEIGHT = 1280, 720
 WINDOW_TITLE = 'AC Radio'
 
+# Full rate while anything is moving
+ACTIVE_RATE = 1 / 60
+# When nothing is, tick slowly and only redraw as a safety net
+IDLE_UPDATE_RATE = 1 / 4
+IDLE_DRAW_RATE = 1
+# How long to stay at full rate after the last wake-up
+ACTIVE_LINGER = 0.25
+
 class Window(ArcadeWindow):
+    """A window that drops to a low update and draw rate when nothing on screen is changing.
+
+    Call `wake` (or `View.invalidate`) when something visible changes; it switches
+    back to full rate for at least `ACTIVE_LINGER` seconds. Callables in
+    `keep_awake` hold full rate for as long as any of them returns True, which is
+    how animations keep it running. Key presses and resizes wake it automatically.
+    """
 
     def __init__(self):
-        super().__init__(WINDOW_WIDTH, WINDOW_HEIGHT, WINDOW_TITLE)
+        super().__init__(WINDOW_WIDTH, WINDOW_HEIGHT, WINDOW_TITLE, update_rate = ACTIVE_RATE, draw_rate = ACTIVE_RATE)
+        self.idle_enabled = True
+        self.idle = False
+        self.keep_awake: list[Callable[[], bool]] = []
+        self._awake_for = ACTIVE_LINGER
+
+    def wake(self, duration: float = ACTIVE_LINGER) -> None:
+        self._awake_for = max(self._awake_for, duration)
+        if self.idle:
+            self.idle = False
+            self.set_update_rate(ACTIVE_RATE)
+            self.set_draw_rate(ACTIVE_RATE)
+
+    def _sleep(self) -> None:
+        self.idle = True
+        self.set_update_rate(IDLE_UPDATE_RATE)
+        self.set_draw_rate(IDLE_DRAW_RATE)
+
+    def on_update(self, delta_time: float) -> bool | None:
+        if self.idle or not self.idle_enabled:
+            return None
+        self._awake_for -= delta_time
+        if self._awake_for <= 0 and not any(awake() for awake in self.keep_awake):
+            self._sleep()
+        return None
+
+    def on_key_press(self, symbol: int, modifiers: int) -> bool | None:
+        self.wake()
+        return None
+
+    def on_resize(self, width: int, height: int) -> bool | None:
+        self.wake()
+        return super().on_resize(width, height)
 
 
 class View(ArcadeView):
 
     def __init__(self, window: Window | None = None) -> None:
         super().__init__(window)
+
+    def invalidate(self) -> None:
+        """Mark the view as changed so the window redraws at full rate."""
+        wake = getattr(self.window, "wake", None)
+        if wake is not None:
+            wake()
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import NamedTuple
+
+import pyglet.media
+from pyglet.media import Source, StaticSource
+
+__all__ = (
+    'CacheStats',
+    'DecodedAudioCache'
+)
+
+type CacheKey = tuple[str, int]
+
+
+class CacheStats(NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    bytes: int
+    budget: int
+
+
+def _pcm_size(source: Source) -> int:
+    if source.audio_format is None or source.duration is None:
+        return 0
+    return int(source.duration * source.audio_format.bytes_per_second)
+
+
+class DecodedAudioCache:
+    """A memory-bounded LRU cache of fully decoded audio.
+
+    Entries are keyed by path and modification time, so an edited file is decoded
+    again rather than served stale. Each `get` hands out a fresh player source over
+    the shared PCM, so any number of players can use one entry at no decode cost.
+
+    Safe to use from worker threads; `decode` is meant to run on one.
+    """
+    def __init__(self, budget: int) -> None:
+        self.budget = budget
+        self._entries: OrderedDict[CacheKey, tuple[StaticSource, int]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(path: Path | str) -> CacheKey:
+        return str(path), Path(path).stat().st_mtime_ns
+
+    def get(self, path: Path | str) -> Source | None:
+        """Get a playable source for `path` if it's cached, otherwise `None`."""
+        try:
+            key = self.key(path)
+        except OSError:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return entry[0].get_queue_source()
+
+    def __contains__(self, path: Path | str) -> bool:
+        try:
+            key = self.key(path)
+        except OSError:
+            return False
+        with self._lock:
+            return key in self._entries
+
+    def decode(self, path: Path | str, size: int = 0) -> bool:
+        """Decode `path` fully into the cache. Returns whether it's cached afterwards.
+
+        Files that wouldn't fit in the budget on their own are skipped without decoding.
+        Pass the decoded `size` if it's already known (e.g. from the library index) to
+        skip opening the file just to find out. This blocks for the whole decode, so
+        call it off the main thread.
+        """
+        key = self.key(path)
+        with self._lock:
+            if key in self._entries:
+                return True
+
+        if not size:
+            probe = pyglet.media.load(str(path), streaming=True)
+            size = _pcm_size(probe)
+            probe.delete()
+        if not 0 < size <= self.budget:
+            return False
+
+        source = StaticSource(pyglet.media.load(str(path), streaming=True))
+        with self._lock:
+            self._insert(key, source, _pcm_size(source) or size)
+        return True
+
+    def _insert(self, key: CacheKey, source: StaticSource, size: int) -> None:
+        # Drop older versions of the same file first
+        for stale in [k for k in self._entries if k[0] == key[0]]:
+            self._evict(stale)
+        while self._entries and self._bytes + size > self.budget:
+            self._evict(next(iter(self._entries)))
+        self._entries[key] = source, size
+        self._bytes += size
+
+    def _evict(self, key: CacheKey) -> None:
+        _, size = self._entries.pop(key)
+        self._bytes -= size
+        self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    @property
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(self.hits, self.misses, self.evictions, len(self._entries), self._bytes, self.budget)
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+from weakref import WeakKeyDictionary
+
+from arcade import ArcadeContext
+from arcade.gl import Geometry, Program, Texture2D
+from arcade.gl.geometry import quad_2d_fs
+from arcade.window_commands import get_window
+
+from acradio.lib.program_cache import cached_program
+
+__all__ = (
+    'get_blit_program',
+    'blit_texture'
+)
+
+V = """
+#version 330
+
+in vec2 in_vert;
+in vec2 in_uv;
+
+out vec2 uv;
+
+void main() {
+    gl_Position = vec4(in_vert, 0.0, 1.0);
+    uv = in_uv;
+}
+"""
+
+F = """
+#version 330
+
+uniform sampler2D tex;
+
+in vec2 uv;
+
+out vec4 fs_color;
+
+void main() {
+    fs_color = texture(tex, uv);
+}
+"""
+
+_resources: WeakKeyDictionary[ArcadeContext, tuple[Program, Geometry]] = WeakKeyDictionary()
+
+
+def get_blit_program(ctx: ArcadeContext) -> tuple[Program, Geometry]:
+    """
+    Get the fullscreen-quad program and geometry for a context, creating them on first use.
+
+    Args:
+        ctx:
+            The context to create the program for.
+
+    Returns:
+        The program and the fullscreen quad geometry it draws with.
+    """
+    resources = _resources.get(ctx)
+    if resources is None:
+        program = cached_program(ctx, vertex_shader=V, fragment_shader=F)
+        program["tex"] = 0
+        resources = program, quad_2d_fs()
+        _resources[ctx] = resources
+    return resources
+
+
+def blit_texture(texture: Texture2D) -> None:
+    """
+    Draw a texture stretched over the whole of the active framebuffer as a single quad.
+
+    Args:
+        texture:
+            The texture to draw.
+    """
+    ctx = get_window().ctx
+    program, geometry = get_blit_program(ctx)
+
+    ctx.enable(ctx.BLEND)
+    texture.use(0)
+    geometry.render(program)
+    ctx.disable(ctx.BLEND)
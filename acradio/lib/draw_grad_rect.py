@@ -1,10 +1,21 @@
 from __future__ import annotations
 
 import array
+from collections.abc import Sequence
+from typing import NamedTuple
+from weakref import WeakKeyDictionary
 
+import numpy as np
+import numpy.typing as npt
+
+from arcade import ArcadeContext
+from arcade.gl import Program, Texture2D
 from arcade.types import Color, Rect, RGBOrA255
 from arcade.window_commands import get_window
 
+from acradio.lib.oklab import srgb_to_oklab
+from acradio.lib.program_cache import cached_program
+
 V = """
 #version 330
 
@@ -69,65 +80,29 @@ void main() {
 
 F = """
 #version 330
-uniform vec4 colora;
-uniform vec4 colorb;
-
-in vec2 gs_uv;
 
-out vec4 fs_color;
-
-#define NEWTON_ITER 1
-#define HALLEY_ITER 1
+#define MAX_STOPS 16
 
-float cbrt( float x )
-{
-	float y = sign(x) * uintBitsToFloat( floatBitsToUint( abs(x) ) / 3u + 0x2a514067u );
+uniform int stop_count;
+uniform float stops[MAX_STOPS];
+// Oklab + alpha, converted on the CPU by compile_gradient()
+uniform vec4 colors[MAX_STOPS];
 
-	for( int i = 0; i < NEWTON_ITER; ++i )
-    	y = ( 2. * y + x / ( y * y ) ) * .333333333;
-
-    for( int i = 0; i < HALLEY_ITER; ++i )
-    {
-    	float y3 = y * y * y;
-        y *= ( y3 + 2. * x ) / ( 2. * y3 + x );
-    }
-    
-    return y;
-}
+in vec2 gs_uv;
 
-float gammaToLinear(float c){
-  return c >= 0.04045 ? pow((c + 0.055) / 1.055, 2.4) : c / 12.92;
-}
+out vec4 fs_color;
 
-// correlary of the first " : "..then switching back" :
+// Linear RGB -> gamma-encoded sRGB
 float linearToGamma(float c){
   return c >= 0.0031308 ? 1.055 * pow(c, 1 / 2.4) - 0.055 : 12.92 * c;
 }
 
-vec3 rgbToOklab(vec3 c) {
-  // This is my undersanding: JavaScript canvas and many other virtual and literal devices use gamma-corrected (non-linear lightness) RGB, or sRGB. To convert sRGB values for manipulation in the Oklab color space, you must first convert them to linear RGB. Where Oklab interfaces with RGB it expects and returns linear RGB values. This next step converts (via a function) sRGB to linear RGB for Oklab to use:
-  float r = gammaToLinear(c.r); 
-  float g = gammaToLinear(c.g);
-  float b = gammaToLinear(c.b);
-  // This is the Oklab math:
-  float l = 0.4122214708 * r + 0.5363325363 * g + 0.0514459929 * b;
-  float m = 0.2119034982 * r + 0.6806995451 * g + 0.1073969566 * b;
-  float s = 0.0883024619 * r + 0.2817188376 * g + 0.6299787005 * b;
-
-  l = cbrt(l); m = cbrt(m); s = cbrt(s);
-  return vec3(
-    l * +0.2104542553 + m * +0.7936177850 + s * -0.0040720468,
-    l * +1.9779984951 + m * -2.4285922050 + s * +0.4505937099,
-    l * +0.0259040371 + m * +0.7827717662 + s * -0.8086757660
-  );
-}
-
 vec3 oklabToSRGB(vec3 c) {
   float l = c.r + c.g * +0.3963377774 + c.b * +0.2158037573;
   float m = c.r + c.g * -0.1055613458 + c.b * -0.0638541728;
   float s = c.r + c.g * -0.0894841775 + c.b * -1.2914855480;
-  // The ** operator here cubes; same as l_*l_*l_ in the C++ example:
-  l = pow(l, 3.0); m = pow(m, 3.0); s = pow(s, 3.0);
+  // Cube by hand; pow() is undefined for negative bases:
+  l = l * l * l; m = m * m * m; s = s * s * s;
   float r = l * +4.0767416621 + m * -3.3077115913 + s * +0.2309699292;
   float g = l * -1.2684380046 + m * +2.6097574011 + s * -0.3413193965;
   float b = l * -0.0041960863 + m * -0.7034186147 + s * +1.7076147010;
@@ -138,46 +113,176 @@ vec3 oklabToSRGB(vec3 c) {
   return vec3(r, g, b);
 }
 
+void main() {
+    // Stop positions run from the top of the rect (0.0) to the bottom (1.0)
+    float t = 1.0 - gs_uv.y;
+
+    // Past the last stop we hold its color
+    vec4 color = colors[stop_count - 1];
+    for (int i = 1; i < MAX_STOPS; ++i) {
+        if (i >= stop_count) break;
+        if (t <= stops[i]) {
+            float span = max(stops[i] - stops[i - 1], 1e-6);
+            color = mix(colors[i - 1], colors[i], clamp((t - stops[i - 1]) / span, 0.0, 1.0));
+            break;
+        }
+    }
+    fs_color = vec4(oklabToSRGB(color.rgb), color.a);
+}
+"""
+
+F_TIMELINE = """
+#version 330
 
+// Rows are points in time, columns are positions down the rect, already in sRGB
+uniform sampler2D timeline;
+uniform float row;
 
-void main() {
-    vec4 a = vec4(rgbToOklab(colora.rgb), colora.a);
-    vec4 b = vec4(rgbToOklab(colorb.rgb), colorb.a);
+in vec2 gs_uv;
 
-    vec4 m = mix(b, a, gs_uv.y);
-    fs_color = vec4(oklabToSRGB(m.rgb), m.a);
+out vec4 fs_color;
+
+void main() {
+    vec2 size = vec2(textureSize(timeline, 0));
+    // Sample texel centres so position 0.0 and 1.0 land exactly on the end columns
+    float x = ((1.0 - gs_uv.y) * (size.x - 1.0) + 0.5) / size.x;
+    float y = (row + 0.5) / size.y;
+    fs_color = texture(timeline, vec2(x, y));
 }
 """
 
+MAX_STOPS = 16
 
-def draw_rect_gradient(
-    rect: Rect, color_a: RGBOrA255, color_b: RGBOrA255, tilt_angle: float = 0
-) -> None:
+type GradientStops = Sequence[tuple[float, RGBOrA255]]
+
+
+class CompiledGradient(NamedTuple):
+    """A gradient packed into the layout the gradient shader expects.
+
+    Both arrays are float32 and padded out to :py:data:`MAX_STOPS`.
+    """
+    count: int
+    positions: npt.NDArray[np.float32]
+    """Stop positions, shape ``(MAX_STOPS,)``."""
+    colors: npt.NDArray[np.float32]
+    """Oklab color and alpha per stop, shape ``(MAX_STOPS, 4)``."""
+
+
+def compile_gradient(stops: GradientStops) -> CompiledGradient:
+    """
+    Convert a sequence of stops into a :py:class:`CompiledGradient`.
+
+    The sRGB -> Oklab conversion happens here, once, instead of per fragment.
+
+    Args:
+        stops:
+            A sequence of ``(position, color)`` pairs sorted by position,
+            where ``0.0`` is the top of the rectangle and ``1.0`` the bottom.
+            At most :py:data:`MAX_STOPS` stops are supported.
+    """
+    count = len(stops)
+    if not 0 < count <= MAX_STOPS:
+        raise ValueError(f"Gradients need between 1 and {MAX_STOPS} stops, got {count}.")
+
+    rgba = np.array([Color.from_iterable(color).normalized for _, color in stops], dtype=np.float64)
+
+    positions = np.zeros(MAX_STOPS, dtype=np.float32)
+    positions[:count] = [position for position, _ in stops]
+    colors = np.zeros((MAX_STOPS, 4), dtype=np.float32)
+    colors[:count, :3] = srgb_to_oklab(rgba[:, :3])
+    colors[:count, 3] = rgba[:, 3]
+    return CompiledGradient(count, positions, colors)
+
+
+def sample_gradient(gradient: CompiledGradient, positions: npt.ArrayLike) -> npt.NDArray[np.float32]:
+    """
+    Evaluate a compiled gradient on the CPU, matching what the shader draws.
+
+    Args:
+        gradient:
+            The gradient to sample.
+        positions:
+            The positions to sample at, ``0.0`` to ``1.0``.
+
+    Returns:
+        Oklab color and alpha per position, shape ``(len(positions), 4)``.
+    """
+    positions = np.asarray(positions, dtype=np.float32)
+    stops = gradient.positions[:gradient.count]
+    colors = gradient.colors[:gradient.count]
+    return np.stack([np.interp(positions, stops, colors[:, c]) for c in range(4)], axis=-1).astype(np.float32)
+
+
+_programs: WeakKeyDictionary[ArcadeContext, Program] = WeakKeyDictionary()
+_timeline_programs: WeakKeyDictionary[ArcadeContext, Program] = WeakKeyDictionary()
+
+
+def get_gradient_program(ctx: ArcadeContext) -> Program:
+    """
+    Get the gradient program for a context, compiling it on first use.
+
+    The program is cached per context, so calling this every frame is free.
+
+    Args:
+        ctx:
+            The context to compile the program for.
+
+    Returns:
+        The linked gradient program.
+    """
+    program = _programs.get(ctx)
+    if program is None:
+        program = cached_program(ctx, vertex_shader=V, geometry_shader=G, fragment_shader=F,
+                                 defines={"MAX_STOPS": str(MAX_STOPS)})
+        _programs[ctx] = program
+    return program
+
+
+def get_timeline_program(ctx: ArcadeContext) -> Program:
     """
-    Draw a filled-in rectangle.
+    Get the timeline lookup program for a context, compiling it on first use.
+
+    Args:
+        ctx:
+            The context to compile the program for.
+
+    Returns:
+        The linked timeline program.
+    """
+    program = _timeline_programs.get(ctx)
+    if program is None:
+        program = cached_program(ctx, vertex_shader=V, geometry_shader=G, fragment_shader=F_TIMELINE)
+        program["timeline"] = 0
+        _timeline_programs[ctx] = program
+    return program
+
+
+def draw_rect_compiled_gradient(rect: Rect, gradient: CompiledGradient, tilt_angle: float = 0) -> None:
+    """
+    Draw a rectangle filled with a multi-stop vertical gradient in a single draw call.
+
+    Colors are interpolated in Oklab between neighbouring stops.
 
     Args:
         rect:
             The rectangle to draw. a :py:class`~arcade.types.Rect` instance.
-        color:
-            The fill color as an RGBA :py:class:`tuple`,
-            RGB :py:class:`tuple, or :py:class`.Color` instance.
+        gradient:
+            The gradient to fill with, from :py:func:`compile_gradient`.
         tilt_angle:
             rotation of the rectangle (clockwise). Defaults to zero.
     """
-    # Fail if we don't have a window, context, or right GL abstractions
     window = get_window()
     ctx = window.ctx
-    program = ctx.shape_rectangle_filled_unbuffered_program  # type: ignore
-    program = ctx.program(vertex_shader=V, geometry_shader=G, fragment_shader=F)
+    program = get_gradient_program(ctx)
     geometry = ctx.shape_rectangle_filled_unbuffered_geometry
     buffer = ctx.shape_rectangle_filled_unbuffered_buffer  # type: ignore
 
     ctx.enable(ctx.BLEND)
 
     # Pass data to the shader
-    program["colora"] = Color.from_iterable(color_a).normalized
-    program["colorb"] = Color.from_iterable(color_b).normalized
+    program["stop_count"] = gradient.count
+    program["stops"] = gradient.positions
+    program["colors"] = gradient.colors.ravel()
     program["shape"] = rect.width, rect.height, tilt_angle
     buffer.orphan()
     buffer.write(data=array.array("f", (rect.x, rect.y)))
@@ -185,3 +290,79 @@ def draw_rect_gradient(
     geometry.render(program, mode=ctx.POINTS, vertices=1)
 
     ctx.disable(ctx.BLEND)
+
+
+def draw_rect_timeline_gradient(rect: Rect, timeline: Texture2D, row: float, tilt_angle: float = 0) -> None:
+    """
+    Draw a rectangle filled with one row of a baked gradient timeline.
+
+    The timeline is a texture with one gradient per row (see
+    :py:func:`acradio.core.background.build_sky_timeline`), so the cost per
+    frame is a single texture lookup per fragment however many stops the
+    gradients had.
+
+    Args:
+        rect:
+            The rectangle to draw. a :py:class`~arcade.types.Rect` instance.
+        timeline:
+            The timeline texture. It should use linear filtering.
+        row:
+            The row to draw. Fractional rows blend between their neighbours.
+        tilt_angle:
+            rotation of the rectangle (clockwise). Defaults to zero.
+    """
+    window = get_window()
+    ctx = window.ctx
+    program = get_timeline_program(ctx)
+    geometry = ctx.shape_rectangle_filled_unbuffered_geometry
+    buffer = ctx.shape_rectangle_filled_unbuffered_buffer  # type: ignore
+
+    ctx.enable(ctx.BLEND)
+
+    program["row"] = row
+    program["shape"] = rect.width, rect.height, tilt_angle
+    timeline.use(0)
+    buffer.orphan()
+    buffer.write(data=array.array("f", (rect.x, rect.y)))
+
+    geometry.render(program, mode=ctx.POINTS, vertices=1)
+
+    ctx.disable(ctx.BLEND)
+
+
+def draw_rect_stopped_gradient(rect: Rect, stops: GradientStops, tilt_angle: float = 0) -> None:
+    """
+    Draw a rectangle filled with a multi-stop vertical gradient.
+
+    This compiles the stops on every call; prefer :py:func:`compile_gradient`
+    and :py:func:`draw_rect_compiled_gradient` for gradients drawn every frame.
+
+    Args:
+        rect:
+            The rectangle to draw. a :py:class`~arcade.types.Rect` instance.
+        stops:
+            A sequence of ``(position, color)`` pairs, see :py:func:`compile_gradient`.
+        tilt_angle:
+            rotation of the rectangle (clockwise). Defaults to zero.
+    """
+    draw_rect_compiled_gradient(rect, compile_gradient(stops), tilt_angle)
+
+
+def draw_rect_gradient(
+    rect: Rect, color_a: RGBOrA255, color_b: RGBOrA255, tilt_angle: float = 0
+) -> None:
+    """
+    Draw a rectangle filled with a two-color vertical gradient.
+
+    Args:
+        rect:
+            The rectangle to draw. a :py:class`~arcade.types.Rect` instance.
+        color_a:
+            The color at the top, as an RGBA :py:class:`tuple`,
+            RGB :py:class:`tuple, or :py:class`.Color` instance.
+        color_b:
+            The color at the bottom.
+        tilt_angle:
+            rotation of the rectangle (clockwise). Defaults to zero.
+    """
+    draw_rect_stopped_gradient(rect, ((0.0, color_a), (1.0, color_b)), tilt_angle)
@@ -0,0 +1,25 @@
+"""Writing files so that a crash never leaves half of one behind."""
+from pathlib import Path
+
+__all__ = (
+    'atomic_write',
+)
+
+
+def atomic_write(path: Path, data: bytes | str) -> None:
+    """Write `data` (text is written as UTF-8) to `path`, creating its directory if needed.
+
+    The data goes to a temporary file next to `path` that's renamed over it once
+    complete, so readers see either the old file or the new one. Raises `OSError`
+    like any other write, after removing the temporary file.
+    """
+    if isinstance(data, str):
+        data = data.encode()
+    path.parent.mkdir(parents = True, exist_ok = True)
+    tmp = path.with_name(path.name + ".tmp")
+    try:
+        tmp.write_bytes(data)
+        tmp.replace(path)
+    except BaseException:
+        tmp.unlink(missing_ok = True)
+        raise
@@ -0,0 +1,187 @@
+"""Font loading on first use, and glyph warm-up backed by a cache on disk.
+
+`require_font` loads a font file the first time something asks for it, so
+weights nothing on screen uses are never loaded. It also starts hashing the
+file on a worker thread, because the hash is part of the glyph cache key.
+
+pyglet rasterizes a glyph the first time it's drawn. For the big clock digits
+that's a visible hitch at the first few minute rollovers. `GlyphCache.warm`
+rasterizes every glyph a label will need up front, straight into the font's
+own atlas. The glyph bitmaps and metrics are then saved under
+`paths.glyph_cache_path`, so later runs upload them instead of rasterizing.
+
+Each cache entry is keyed by the hashes of the font files its family could
+resolve to, the font's size and style, the characters warmed, and the pyglet
+version and font backend. Changing any of those just misses. Hashing and all cache file reads and writes happen on
+the worker thread. pyglet's rasterizers upload straight into GL, and GL work
+has to stay on the main thread, so rasterizing and uploading run there.
+"""
+from __future__ import annotations
+
+import hashlib
+import struct
+from collections.abc import Iterable
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING, NamedTuple
+
+import pyglet
+from pyglet.image import ImageData
+
+from acradio.lib import paths
+from acradio.lib.files import atomic_write
+from resources import load_font, load_otf_font, read_font, read_otf_font
+
+if TYPE_CHECKING:
+    from arcade import Text
+    from pyglet.font.base import Font, Glyph
+
+__all__ = (
+    'require_font',
+    'font_digest',
+    'GlyphSet',
+    'GlyphCache'
+)
+
+MAGIC = b"ACGL"
+VERSION = 1
+
+# magic, version, glyph count
+_HEADER = struct.Struct("<4sHxxI")
+# key, key is a glyph index (not a character), flipped, colored, width, height, baseline, lsb, advance
+_GLYPH = struct.Struct("<iBBBxHHiii")
+
+# Hashing and cache file IO; one thread is plenty and keeps the writes ordered
+_worker = ThreadPoolExecutor(max_workers = 1, thread_name_prefix = "Fonts")
+_digests: dict[str, Future[bytes]] = {}
+
+
+def _hash_font(data: bytes | memoryview) -> bytes:
+    return hashlib.blake2b(data, digest_size = 16).digest()
+
+
+def require_font(name: str, *, otf: bool = True) -> None:
+    """Load the font file `name` unless it's already loaded, and start hashing it."""
+    if name in _digests:
+        return
+    (load_otf_font if otf else load_font)(name)
+    _digests[name] = _worker.submit(lambda: _hash_font((read_otf_font if otf else read_font)(name)))
+
+
+def font_digest(name: str) -> bytes:
+    """The hash of font file `name`, which has to have been loaded with `require_font`. Waits if it's still hashing."""
+    return _digests[name].result()
+
+
+class GlyphSet(NamedTuple):
+    """Characters a label needs, and every font file its font could be resolved from."""
+    text: Text
+    characters: str
+    font_files: tuple[str, ...]
+
+
+def _label_font(text: Text) -> Font:
+    """The exact `Font` object `text` draws with, out of pyglet's font cache."""
+    label = text.label
+    return label.document.get_font(dpi = label.dpi)
+
+
+def _flipped(glyph: Glyph) -> bool:
+    # Renderers that hand over top-down bitmaps swap the region's tex coords rather than the rows
+    return glyph.tex_coords[1] > glyph.tex_coords[7]
+
+
+def _pack_glyphs(glyphs: dict[str | int, Glyph]) -> bytes:
+    """Read `glyphs` back out of their atlas textures, each texture once, into the cache format."""
+    atlases: dict[int, ImageData] = {}
+    out = bytearray()
+    count = 0
+    for key, glyph in glyphs.items():
+        if isinstance(key, str) and len(key) != 1:
+            continue
+        atlas = atlases.get(glyph.owner.id)
+        if atlas is None:
+            atlas = atlases[glyph.owner.id] = glyph.owner.get_image_data()
+        data = atlas.get_region(glyph.x, glyph.y, glyph.width, glyph.height).get_image_data().get_data("RGBA", glyph.width * 4)
+        by_index = isinstance(key, int)
+        out += _GLYPH.pack(key if by_index else ord(key), by_index, _flipped(glyph), glyph.colored,
+                           glyph.width, glyph.height, glyph.baseline, glyph.lsb, glyph.advance)
+        out += data
+        count += 1
+    return _HEADER.pack(MAGIC, VERSION, count) + out
+
+
+def _unpack_glyphs(data: bytes) -> list[tuple[str | int, tuple[int, ...], bytes]]:
+    magic, version, count = _HEADER.unpack_from(data)
+    if (magic, version) != (MAGIC, VERSION):
+        raise ValueError("not a glyph cache file")
+    glyphs = []
+    offset = _HEADER.size
+    for _ in range(count):
+        key, by_index, *info = _GLYPH.unpack_from(data, offset)
+        offset += _GLYPH.size
+        width, height = info[2], info[3]
+        size = width * height * 4
+        glyphs.append((key if by_index else chr(key), tuple(info), data[offset:offset + size]))
+        offset += size
+    return glyphs
+
+
+class GlyphCache:
+    """Warms label fonts' glyph atlases, from bitmaps saved on disk when there are any. See the module docstring."""
+    def __init__(self, path: Path = paths.glyph_cache_path) -> None:
+        self.path = path
+        self.loaded = 0
+        self.rasterized = 0
+
+    def key(self, font: Font, glyph_set: GlyphSet) -> str:
+        h = hashlib.blake2b(digest_size = 16)
+        for name in glyph_set.font_files:
+            h.update(font_digest(name))
+        characters = "".join(sorted(set(glyph_set.characters)))
+        descriptor = (font.name, font.size, font.weight, font.italic, font.stretch, font.dpi, characters,
+                      pyglet.version, type(font).__name__)
+        h.update(repr(descriptor).encode())
+        return h.hexdigest()
+
+    def _read(self, key: str) -> list[tuple[str | int, tuple[int, ...], bytes]] | None:
+        try:
+            return _unpack_glyphs((self.path / f"{key}.bin").read_bytes())
+        except (OSError, ValueError, struct.error):
+            return None
+
+    def _write(self, key: str, data: bytes) -> None:
+        try:
+            atomic_write(self.path / f"{key}.bin", data)
+        except OSError:
+            pass
+
+    def warm(self, glyph_sets: Iterable[GlyphSet]) -> None:
+        """Make sure every glyph in `glyph_sets` is in its font's atlas. Call on the main thread, with the GL context current."""
+        jobs = []
+        for glyph_set in glyph_sets:
+            font = _label_font(glyph_set.text)
+            key = self.key(font, glyph_set)
+            jobs.append((font, glyph_set, key, _worker.submit(self._read, key)))
+
+        for font, glyph_set, key, cached in jobs:
+            self._upload(font, cached.result() or ())
+            before = len(font.glyphs)
+            font.get_glyphs(glyph_set.characters)
+            if len(font.glyphs) > before:
+                # Something had to be rasterized, so the cache was missing or incomplete
+                self.rasterized += len(font.glyphs) - before
+                _worker.submit(self._write, key, _pack_glyphs(font.glyphs))
+
+    def _upload(self, font: Font, glyphs: Iterable[tuple[str | int, tuple[int, ...], bytes]]) -> None:
+        for key, (flipped, colored, width, height, baseline, lsb, advance), data in glyphs:
+            if key in font.glyphs:
+                continue
+            glyph = font.create_glyph(ImageData(width, height, "RGBA", data, width * 4))
+            glyph.set_bearings(baseline, lsb, advance)
+            glyph.colored = bool(colored)
+            if flipped:
+                t = list(glyph.tex_coords)
+                glyph.tex_coords = t[9:12] + t[6:9] + t[3:6] + t[:3]
+            font.glyphs[key] = glyph
+            self.loaded += 1
@@ -0,0 +1,92 @@
+from collections.abc import Callable
+
+from arcade import Text
+from arcade.types import Color
+
+__all__ = (
+    'Label',
+)
+
+
+class Label:
+    """An `arcade.Text` that only relayouts when its content actually changes.
+
+    Setting `text`, `color` or `alpha` to what's already shown is a comparison
+    and nothing else. Hidden labels skip `update` entirely, so their text isn't
+    even formatted. The edges are read straight off the wrapped `Text`; for
+    anything else, use `text_object`.
+
+    Labels whose `Text` was made with a ``batch`` are drawn by drawing the batch;
+    `visible` and `alpha` carry through to it.
+    """
+    def __init__(self, text: Text, *, visible: bool = True) -> None:
+        self.text_object = text
+        self._text = text.text
+        self._color = text.color
+        self._visible = visible
+        text.visible = visible
+
+    @property
+    def left(self) -> float:
+        return self.text_object.left
+
+    @property
+    def right(self) -> float:
+        return self.text_object.right
+
+    @property
+    def top(self) -> float:
+        return self.text_object.top
+
+    @property
+    def bottom(self) -> float:
+        return self.text_object.bottom
+
+    @property
+    def visible(self) -> bool:
+        return self._visible
+
+    @visible.setter
+    def visible(self, visible: bool) -> None:
+        if visible != self._visible:
+            self._visible = visible
+            self.text_object.visible = visible
+
+    @property
+    def text(self) -> str:
+        return self._text
+
+    @text.setter
+    def text(self, text: str) -> None:
+        if text != self._text:
+            self._text = text
+            self.text_object.text = text
+
+    @property
+    def color(self) -> Color:
+        return self._color
+
+    @color.setter
+    def color(self, color: Color) -> None:
+        if color != self._color:
+            self._color = color
+            self.text_object.color = color
+
+    @property
+    def alpha(self) -> int:
+        return self._color.a
+
+    @alpha.setter
+    def alpha(self, alpha: int) -> None:
+        if alpha != self._color.a:
+            self.color = self._color.replace(a = alpha)
+
+    def update(self, format_text: Callable[[], str]) -> None:
+        """Set the text from `format_text`, which isn't called at all while the label is hidden."""
+        if self._visible:
+            self.text = format_text()
+
+    def draw(self) -> None:
+        """Draw just this label. Batched labels are normally drawn with their batch instead."""
+        if self._visible:
+            self.text_object.draw()
@@ -0,0 +1,86 @@
+"""Vectorized sRGB <-> Oklab conversions.
+
+All functions take arrays whose last axis holds the three color channels
+and return arrays of the same shape. See https://bottosson.github.io/posts/oklab/
+"""
+import numpy as np
+import numpy.typing as npt
+
+__all__ = (
+    'srgb_to_linear',
+    'linear_to_srgb',
+    'linear_srgb_to_oklab',
+    'oklab_to_linear_srgb',
+    'srgb_to_oklab',
+    'oklab_to_srgb',
+    'uint24_to_srgb'
+)
+
+type FloatArray = npt.NDArray[np.floating]
+
+# Linear sRGB -> LMS cone response
+_M1 = np.array([
+    [0.4122214708, 0.5363325363, 0.0514459929],
+    [0.2119034982, 0.6806995451, 0.1073969566],
+    [0.0883024619, 0.2817188376, 0.6299787005]
+])
+
+# Non-linear LMS -> Oklab
+_M2 = np.array([
+    [0.2104542553, +0.7936177850, -0.0040720468],
+    [1.9779984951, -2.4285922050, +0.4505937099],
+    [0.0259040371, +0.7827717662, -0.8086757660]
+])
+
+# Oklab -> non-linear LMS
+_M2_INV = np.array([
+    [1.0, +0.3963377774, +0.2158037573],
+    [1.0, -0.1055613458, -0.0638541728],
+    [1.0, -0.0894841775, -1.2914855480]
+])
+
+# LMS -> linear sRGB
+_M1_INV = np.array([
+    [+4.0767416621, -3.3077115913, +0.2309699292],
+    [-1.2684380046, +2.6097574011, -0.3413193965],
+    [-0.0041960863, -0.7034186147, +1.7076147010]
+])
+
+
+def srgb_to_linear(c: npt.ArrayLike) -> FloatArray:
+    """Undo the sRGB transfer function. Channels are in the range 0-1."""
+    c = np.asarray(c, dtype=np.float64)
+    return np.where(c >= 0.04045, ((c + 0.055) / 1.055) ** 2.4, c / 12.92)
+
+
+def linear_to_srgb(c: npt.ArrayLike) -> FloatArray:
+    """Apply the sRGB transfer function. Channels are in the range 0-1."""
+    c = np.asarray(c, dtype=np.float64)
+    return np.where(c >= 0.0031308, 1.055 * np.maximum(c, 0.0031308) ** (1 / 2.4) - 0.055, 12.92 * c)
+
+
+def linear_srgb_to_oklab(rgb: npt.ArrayLike) -> FloatArray:
+    lms = np.asarray(rgb, dtype=np.float64) @ _M1.T
+    return np.cbrt(lms) @ _M2.T
+
+
+def oklab_to_linear_srgb(lab: npt.ArrayLike) -> FloatArray:
+    lms = (np.asarray(lab, dtype=np.float64) @ _M2_INV.T) ** 3
+    return lms @ _M1_INV.T
+
+
+def srgb_to_oklab(rgb: npt.ArrayLike) -> FloatArray:
+    """Convert gamma-encoded sRGB (0-1) to Oklab."""
+    return linear_srgb_to_oklab(srgb_to_linear(rgb))
+
+
+def oklab_to_srgb(lab: npt.ArrayLike) -> FloatArray:
+    """Convert Oklab to gamma-encoded sRGB (0-1), clamped to the displayable range."""
+    return np.clip(linear_to_srgb(oklab_to_linear_srgb(lab)), 0.0, 1.0)
+
+
+def uint24_to_srgb(colors: npt.ArrayLike) -> FloatArray:
+    """Unpack ``0xRRGGBB`` integers into sRGB (0-1) triples."""
+    colors = np.asarray(colors, dtype=np.uint32)
+    channels = np.stack(((colors >> 16) & 0xFF, (colors >> 8) & 0xFF, colors & 0xFF), axis=-1)
+    return channels / 255.0
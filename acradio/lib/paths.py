@@ -4,3 +4,9 @@ from appdirs import user_data_dir
 data_path = Path(user_data_dir("ACRadio", "DigiDuncan"))
 music_path = data_path / "music"
 settings_path = data_path / "settings.json"
+settings_cache_path = data_path / "settings.bin"
+weather_cache_path = data_path / "weather_cache.json"
+library_index_path = data_path / "library.json"
+pcm_cache_path = data_path / "pcm"
+shader_cache_path = data_path / "shaders"
+glyph_cache_path = data_path / "glyphs"
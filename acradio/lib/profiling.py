@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import json
+import time
+from pathlib import Path
+from types import TracebackType
+
+import numpy as np
+
+__all__ = (
+    'RingBuffer',
+    'Section',
+    'FrameTimer'
+)
+
+
+class RingBuffer:
+    """A fixed-size buffer of the most recent float samples."""
+    def __init__(self, size: int) -> None:
+        self.data = np.zeros(size, dtype = np.float64)
+        self.index = 0
+        self.count = 0
+
+    def append(self, value: float) -> None:
+        self.data[self.index] = value
+        self.index = (self.index + 1) % len(self.data)
+        if self.count < len(self.data):
+            self.count += 1
+
+    def percentiles(self, qs: tuple[float, ...] = (50, 95, 99)) -> tuple[float, ...]:
+        if not self.count:
+            return tuple(0.0 for _ in qs)
+        return tuple(np.percentile(self.data[:self.count], qs))
+
+    def clear(self) -> None:
+        self.index = 0
+        self.count = 0
+
+
+class Section:
+    """Times one named block; reused every frame so timing allocates nothing."""
+    __slots__ = ('buffer', 'start', 'timer')
+
+    def __init__(self, timer: FrameTimer, buffer: RingBuffer) -> None:
+        self.timer = timer
+        self.buffer = buffer
+        self.start = 0.0
+
+    def __enter__(self) -> None:
+        if self.timer.enabled:
+            self.start = time.perf_counter()
+
+    def __exit__(self, exc_type: type[BaseException] | None, exc: BaseException | None, tb: TracebackType | None) -> None:
+        if self.timer.enabled and self.start:
+            self.buffer.append(time.perf_counter() - self.start)
+            self.start = 0.0
+
+
+class FrameTimer:
+    """Rolling timings for named sections of the frame.
+
+    Use as ``with timer["background"]: ...``. While disabled each section costs a
+    dict lookup and an attribute check, so it can be left in production code.
+    """
+    def __init__(self, size: int = 600, *, enabled: bool = False) -> None:
+        self.size = size
+        self.enabled = enabled
+        self.sections: dict[str, Section] = {}
+
+    def __getitem__(self, name: str) -> Section:
+        section = self.sections.get(name)
+        if section is None:
+            section = self.sections[name] = Section(self, RingBuffer(self.size))
+        return section
+
+    def toggle(self) -> None:
+        self.enabled = not self.enabled
+        for section in self.sections.values():
+            section.start = 0.0
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        """p50/p95/p99 per section, in milliseconds."""
+        out = {}
+        for name, section in self.sections.items():
+            p50, p95, p99 = section.buffer.percentiles()
+            out[name] = {"p50": p50 * 1000, "p95": p95 * 1000, "p99": p99 * 1000, "count": section.buffer.count}
+        return out
+
+    def format(self) -> str:
+        return "\n".join(
+            f"{name:<18} p50 {s['p50']:6.2f}  p95 {s['p95']:6.2f}  p99 {s['p99']:6.2f} ms"
+            for name, s in self.summary().items()
+        )
+
+    def dump(self, path: Path) -> None:
+        """Append the current summary to `path` as one JSON line."""
+        path.parent.mkdir(parents = True, exist_ok = True)
+        with open(path, "a") as f:
+            f.write(json.dumps({"time": time.time(), "sections": self.summary()}) + "\n")
+
+    def clear(self) -> None:
+        for section in self.sections.values():
+            section.buffer.clear()
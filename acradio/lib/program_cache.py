@@ -0,0 +1,340 @@
+"""Shader programs, compiled once per context and kept on disk between runs.
+
+`cached_program` takes the same arguments as `ctx.program`. Programs are keyed
+by a hash of every stage's source plus `common`, `defines` and the varyings, so
+asking again for the same thing returns the same `Program`. To load shaders
+from the resources package through it, pass
+``make_program = partial(cached_program, ctx)`` to `resources.load_program`.
+
+Where the driver supports program binaries (OpenGL 4.1+), programs are linked
+with their binary retrievable, and each new one is saved under
+`paths.shader_cache_path` for later runs to load instead of compiling. The
+driver's vendor, renderer and version are part of the key, so an update just
+misses the old files. Each binary is stored with the attributes, uniforms and
+geometry info its program had when it was compiled, and a loaded program has to
+match them exactly. Anything that goes wrong with a binary falls back to
+compiling from source.
+"""
+from __future__ import annotations
+
+import ctypes
+import hashlib
+import json
+import struct
+import weakref
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Required, TypedDict, Unpack
+from weakref import WeakKeyDictionary
+
+from arcade import ArcadeContext
+from arcade.gl import Program
+from arcade.gl.backends.opengl.glsl import ShaderSource
+from arcade.gl.backends.opengl.program import OpenGLProgram
+from pyglet import gl
+
+from acradio.lib import paths
+from acradio.lib.files import atomic_write
+
+__all__ = (
+    'ProgramSources',
+    'ProgramCache',
+    'program_cache',
+    'cached_program'
+)
+
+_MAGIC = b"ACP2"
+# magic, binary format, interface length; then the interface as JSON, then the binary
+_HEADER = struct.Struct("<4sII")
+
+
+class ProgramSources(TypedDict, total = False):
+    """The keyword arguments `ctx.program` takes."""
+    vertex_shader: Required[str]
+    fragment_shader: str | None
+    geometry_shader: str | None
+    tess_control_shader: str | None
+    tess_evaluation_shader: str | None
+    common: list[str] | None
+    defines: dict[str, str] | None
+    varyings: Sequence[str] | None
+    varyings_capture_mode: str
+
+
+def _driver_id(ctx: ArcadeContext) -> str:
+    return f"{ctx.info.VENDOR}|{ctx.info.RENDERER}|{ctx.gl_version}"
+
+
+def _supports_binaries(ctx: ArcadeContext) -> bool:
+    if ctx.gl_api != "opengl" or ctx.gl_version < (4, 1):
+        return False
+    formats = gl.GLint()
+    gl.glGetIntegerv(gl.GL_NUM_PROGRAM_BINARY_FORMATS, formats)
+    return formats.value > 0
+
+
+class _LinkedProgram(OpenGLProgram):
+    """arcade's OpenGL `Program`, linked with its binary retrievable or loaded from a binary.
+
+    ``OpenGLProgram.__init__`` compiles and links in one step, which leaves nowhere to
+    set GL_PROGRAM_BINARY_RETRIEVABLE_HINT or to hand over a binary. This takes the
+    same steps with those two changes. Pass either `shaders` (preprocessed sources and
+    their stage) or `binary` (its format and bytes).
+    """
+    def __init__(self, ctx: ArcadeContext, *, shaders: Sequence[tuple[str, int]] = (),
+                 binary: tuple[int, bytes] | None = None, varyings: Sequence[str] = (),
+                 varyings_capture_mode: str = "interleaved", geometry_info: tuple[int, int, int] = (0, 0, 0)) -> None:
+        Program.__init__(self, ctx, varyings_capture_mode = varyings_capture_mode)
+        if self._varyings_capture_mode not in self._valid_capture_modes:
+            raise ValueError(f"Invalid capture mode '{self._varyings_capture_mode}'")
+        self._glo = glo = gl.glCreateProgram()
+        self._varyings = list(varyings)
+        self._geometry_info = geometry_info
+        self._attributes = []
+        self._uniforms = {}
+        try:
+            if binary is None:
+                self._link(shaders)
+            else:
+                self._load(*binary)
+            self._introspect_attributes()
+            self._introspect_uniforms()
+            self._introspect_uniform_blocks()
+        except BaseException:
+            gl.glDeleteProgram(glo)
+            raise
+        if ctx.gc_mode == "auto":
+            weakref.finalize(self, OpenGLProgram.delete_glo, ctx, glo)
+
+    def _link(self, shaders: Sequence[tuple[str, int]]) -> None:
+        gl.glProgramParameteri(self._glo, gl.GL_PROGRAM_BINARY_RETRIEVABLE_HINT, gl.GL_TRUE)
+        shader_ids = []
+        try:
+            for source, shader_type in shaders:
+                shader_ids.append(OpenGLProgram.compile_shader(source, shader_type))
+                gl.glAttachShader(self._glo, shader_ids[-1])
+            if all(shader_type != gl.GL_FRAGMENT_SHADER for _, shader_type in shaders):
+                self._configure_varyings()
+            OpenGLProgram.link(self._glo)
+        finally:
+            for shader in shader_ids:
+                gl.glDetachShader(self._glo, shader)
+                gl.glDeleteShader(shader)
+
+        if any(shader_type == gl.GL_GEOMETRY_SHADER for _, shader_type in shaders):
+            info = [gl.GLint() for _ in range(3)]
+            for value, name in zip(info, (gl.GL_GEOMETRY_INPUT_TYPE, gl.GL_GEOMETRY_OUTPUT_TYPE, gl.GL_GEOMETRY_VERTICES_OUT),
+                                   strict = True):
+                gl.glGetProgramiv(self._glo, name, value)
+            self._geometry_info = (info[0].value, info[1].value, info[2].value)
+
+    def _load(self, binary_format: int, binary: bytes) -> None:
+        gl.glProgramBinary(self._glo, binary_format, ctypes.c_char_p(binary), len(binary))
+        status = gl.GLint()
+        gl.glGetProgramiv(self._glo, gl.GL_LINK_STATUS, status)
+        if not status.value:
+            # The driver rejected it (e.g. it changed without changing its version string)
+            raise ValueError("program binary rejected")
+
+
+def _compile(ctx: ArcadeContext, sources: ProgramSources) -> _LinkedProgram:
+    """What `ctx.program` does, except the program is linked with its binary retrievable."""
+    common = sources.get("common")
+    defines = sources.get("defines")
+    stages = [
+        (ShaderSource(ctx, source, common, shader_type), shader_type)
+        for source, shader_type in (
+            (sources["vertex_shader"], gl.GL_VERTEX_SHADER),
+            (sources.get("fragment_shader"), gl.GL_FRAGMENT_SHADER),
+            (sources.get("geometry_shader"), gl.GL_GEOMETRY_SHADER),
+            (sources.get("tess_control_shader"), gl.GL_TESS_CONTROL_SHADER),
+            (sources.get("tess_evaluation_shader"), gl.GL_TESS_EVALUATION_SHADER)
+        )
+        if source
+    ]
+    varyings = list(sources.get("varyings") or ())
+    # Without a fragment shader it's transform feedback, capturing the last stage's outputs
+    if not sources.get("fragment_shader") and not varyings:
+        last = next((source for source, shader_type in stages if shader_type == gl.GL_GEOMETRY_SHADER), stages[0][0])
+        varyings = last.out_attributes
+    return _LinkedProgram(
+        ctx,
+        shaders = [(source.get_source(defines = defines), shader_type) for source, shader_type in stages],
+        varyings = varyings,
+        varyings_capture_mode = sources.get("varyings_capture_mode", "interleaved")
+    )
+
+
+def _interface(program: Program) -> bytes:
+    """What a linked program exposes: attributes, uniforms, uniform blocks, captured varyings and geometry info.
+
+    All but the geometry info come from GL, so a loaded binary is checked against what it really links to.
+    """
+    glo = program.glo
+    name = ctypes.create_string_buffer(256)
+    size = gl.GLint()
+    gl_type = gl.GLenum()
+    count = gl.GLint()
+
+    gl.glGetProgramiv(glo, gl.GL_ACTIVE_UNIFORMS, count)
+    uniforms = []
+    for i in range(count.value):
+        gl.glGetActiveUniform(glo, i, len(name), None, size, gl_type, name)
+        uniforms.append((name.value.decode(), gl_type.value, size.value, gl.glGetUniformLocation(glo, name)))
+
+    gl.glGetProgramiv(glo, gl.GL_ACTIVE_UNIFORM_BLOCKS, count)
+    blocks = []
+    for i in range(count.value):
+        gl.glGetActiveUniformBlockName(glo, i, len(name), None, name)
+        gl.glGetActiveUniformBlockiv(glo, i, gl.GL_UNIFORM_BLOCK_DATA_SIZE, size)
+        blocks.append((name.value.decode(), size.value))
+
+    gl.glGetProgramiv(glo, gl.GL_TRANSFORM_FEEDBACK_VARYINGS, count)
+    varyings = []
+    for i in range(count.value):
+        gl.glGetTransformFeedbackVarying(glo, i, len(name), None, size, gl_type, name)
+        varyings.append(name.value.decode())
+
+    return json.dumps({
+        "attributes": [(a.name, a.gl_type, a.components, a.location) for a in program.attributes],
+        "uniforms": sorted(uniforms),
+        "blocks": sorted(blocks),
+        "varyings": varyings,
+        "geometry": (program.geometry_input, program.geometry_output, program.geometry_vertices)
+    }, sort_keys = True).encode()
+
+
+class ProgramCache:
+    """Programs per context, plus their linked binaries on disk. See the module docstring."""
+    def __init__(self, path: Path = paths.shader_cache_path, *, persist: bool = True) -> None:
+        self.path = path
+        self.persist = persist
+        self._programs: WeakKeyDictionary[ArcadeContext, dict[str, Program]] = WeakKeyDictionary()
+        self._binaries: WeakKeyDictionary[ArcadeContext, bool] = WeakKeyDictionary()
+        self.hits = 0
+        self.compiled = 0
+        self.loaded = 0
+
+    def key(self, ctx: ArcadeContext, **sources: object) -> str:
+        h = hashlib.blake2b(digest_size = 16)
+        h.update(_driver_id(ctx).encode())
+        h.update(json.dumps(sources, sort_keys = True, default = list).encode())
+        return h.hexdigest()
+
+    def _binary_path(self, key: str) -> Path:
+        return self.path / f"{key}.bin"
+
+    def _use_binaries(self, ctx: ArcadeContext) -> bool:
+        if not self.persist:
+            return False
+        supported = self._binaries.get(ctx)
+        if supported is None:
+            supported = self._binaries[ctx] = _supports_binaries(ctx)
+        return supported
+
+    def program(
+            self,
+            ctx: ArcadeContext,
+            *,
+            vertex_shader: str,
+            fragment_shader: str | None = None,
+            geometry_shader: str | None = None,
+            tess_control_shader: str | None = None,
+            tess_evaluation_shader: str | None = None,
+            common: list[str] | None = None,
+            defines: dict[str, str] | None = None,
+            varyings: Sequence[str] | None = None,
+            varyings_capture_mode: str = "interleaved"
+        ) -> Program:
+        sources = ProgramSources(
+            vertex_shader = vertex_shader, fragment_shader = fragment_shader, geometry_shader = geometry_shader,
+            tess_control_shader = tess_control_shader, tess_evaluation_shader = tess_evaluation_shader,
+            common = common, defines = defines, varyings = varyings, varyings_capture_mode = varyings_capture_mode
+        )
+        key = self.key(ctx, **{**sources, "defines": {k: str(v) for k, v in (defines or {}).items()}})
+        programs = self._programs.setdefault(ctx, {})
+        program = programs.get(key)
+        if program is not None:
+            self.hits += 1
+            return program
+
+        program = self._load_binary(ctx, key, varyings_capture_mode) if self._use_binaries(ctx) else None
+        if program is not None:
+            self.loaded += 1
+        else:
+            program = self._compile(ctx, key, sources)
+            self.compiled += 1
+
+        programs[key] = program
+        return program
+
+    def _compile(self, ctx: ArcadeContext, key: str, sources: ProgramSources) -> Program:
+        if self._use_binaries(ctx):
+            try:
+                program = _compile(ctx, sources)
+            # Shader errors come back out of ctx.program below; anything else means this arcade's
+            # OpenGLProgram doesn't work the way _LinkedProgram expects, so stop trying
+            except Exception:  # noqa: BLE001
+                self._binaries[ctx] = False
+            else:
+                self._store_binary(key, program)
+                return program
+        return ctx.program(**sources)
+
+    def _load_binary(self, ctx: ArcadeContext, key: str, varyings_capture_mode: str) -> Program | None:
+        path = self._binary_path(key)
+        try:
+            data = path.read_bytes()
+        except OSError:
+            return None
+        try:
+            magic, binary_format, interface_size = _HEADER.unpack_from(data)
+            if magic != _MAGIC:
+                raise ValueError("not a program binary")
+            interface = data[_HEADER.size:_HEADER.size + interface_size]
+            expected = json.loads(interface)
+            program = _LinkedProgram(
+                ctx,
+                binary = (binary_format, data[_HEADER.size + interface_size:]),
+                varyings = expected["varyings"],
+                varyings_capture_mode = varyings_capture_mode,
+                geometry_info = tuple(expected["geometry"])
+            )
+            if _interface(program) != interface:
+                raise ValueError("program binary doesn't match its interface")
+        # Whatever is wrong with the file, compiling from source gets a working program
+        except Exception:  # noqa: BLE001
+            path.unlink(missing_ok = True)
+            return None
+        return program
+
+    def _store_binary(self, key: str, program: Program) -> None:
+        length = gl.GLint()
+        gl.glGetProgramiv(program.glo, gl.GL_PROGRAM_BINARY_LENGTH, length)
+        if length.value <= 0:
+            return
+        buffer = ctypes.create_string_buffer(length.value)
+        written = gl.GLsizei()
+        binary_format = gl.GLenum()
+        gl.glGetProgramBinary(program.glo, length.value, written, binary_format, buffer)
+        interface = _interface(program)
+
+        try:
+            atomic_write(self._binary_path(key),
+                         _HEADER.pack(_MAGIC, binary_format.value, len(interface)) + interface + buffer.raw[:written.value])
+        except OSError:
+            pass
+
+    def clear(self) -> None:
+        """Forget every cached program and delete the binaries on disk."""
+        self._programs.clear()
+        for path in self.path.glob("*.bin"):
+            path.unlink(missing_ok = True)
+
+
+program_cache = ProgramCache()
+
+
+def cached_program(ctx: ArcadeContext, **sources: Unpack[ProgramSources]) -> Program:
+    """`ctx.program`, through the shared `program_cache`."""
+    return program_cache.program(ctx, **sources)
@@ -0,0 +1,56 @@
+import time
+from collections.abc import Callable
+
+import pyglet.clock
+from pyglet.clock import Clock
+
+__all__ = (
+    'Scheduler',
+)
+
+# Fire this far past the boundary so a slightly early wake-up still lands in the new minute
+_BOUNDARY_SLACK = 0.01
+
+
+class Scheduler:
+    """Calls back on wall-clock minute boundaries and at a fixed weather refresh interval.
+
+    Built on a pyglet `Clock`, so nothing runs per frame. The minute timer is
+    re-armed from the wall clock after every tick rather than using a fixed
+    interval, so it doesn't drift.
+    """
+    def __init__(self, on_minute: Callable[[], None], on_weather: Callable[[], None],
+                 weather_interval: float = 600, clock: Clock | None = None) -> None:
+        self.on_minute = on_minute
+        self.on_weather = on_weather
+        self.weather_interval = weather_interval
+        self.clock = clock or pyglet.clock.get_default()
+        self.running = False
+
+    @staticmethod
+    def seconds_until_next_minute(now: float | None = None) -> float:
+        now = time.time() if now is None else now
+        return 60 - (now % 60) + _BOUNDARY_SLACK
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self.running = True
+        self._arm_minute()
+        self.clock.schedule_interval(self._weather_tick, self.weather_interval)
+
+    def stop(self) -> None:
+        self.running = False
+        self.clock.unschedule(self._minute_tick)
+        self.clock.unschedule(self._weather_tick)
+
+    def _arm_minute(self) -> None:
+        self.clock.schedule_once(self._minute_tick, self.seconds_until_next_minute())
+
+    def _minute_tick(self, delta_time: float) -> None:
+        self.on_minute()
+        if self.running:
+            self._arm_minute()
+
+    def _weather_tick(self, delta_time: float) -> None:
+        self.on_weather()
@@ -0,0 +1,129 @@
+"""Startup tracing.
+
+`trace` starts timing as soon as this module is imported, so import it first.
+Phases and marks are always recorded (it's a couple of `perf_counter` calls);
+the report is only written when tracing is enabled, either with the
+``--trace-startup`` flag or the ``ACRADIO_TRACE_STARTUP`` environment variable.
+"""
+from __future__ import annotations
+
+import json
+import os
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from pyglet.media import Player
+    from pyglet.window import Window
+
+__all__ = (
+    'StartupTrace',
+    'trace',
+    'after_first_frame'
+)
+
+ENV_VAR = "ACRADIO_TRACE_STARTUP"
+
+
+class StartupTrace:
+    def __init__(self) -> None:
+        self.origin = time.perf_counter()
+        self.phases: list[dict[str, Any]] = []
+        self.marks: dict[str, float] = {}
+        self.path: Path | None = None
+        self.finished = False
+        self._expected: set[str] = set()
+
+    @property
+    def enabled(self) -> bool:
+        return self.path is not None
+
+    def enable(self, path: Path) -> None:
+        self.path = path
+
+    def now(self) -> float:
+        return time.perf_counter() - self.origin
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        if self.finished:
+            yield
+            return
+        start = self.now()
+        try:
+            yield
+        finally:
+            self.phases.append({"name": name, "start": start, "duration": self.now() - start})
+
+    def mark(self, name: str) -> None:
+        """Record the first time `name` happens. Later calls are ignored."""
+        if self.finished or name in self.marks:
+            return
+        self.marks[name] = self.now()
+        if self._expected and self._expected <= self.marks.keys():
+            self.finish()
+
+    def expect(self, *names: str) -> None:
+        """Write the report as soon as all of these marks have been hit."""
+        self._expected.update(names)
+
+    def report(self) -> dict[str, Any]:
+        return {"phases": self.phases, "marks": self.marks}
+
+    def finish(self) -> None:
+        if self.finished:
+            return
+        self.finished = True
+        if self.path is not None:
+            self.path.parent.mkdir(parents = True, exist_ok = True)
+            self.path.write_text(json.dumps(self.report(), indent = 2))
+
+    def watch_first_audio(self, get_player: Callable[[], Player | None], interval: float = 0.005) -> None:
+        """Mark ``first_audio`` once the player's clock starts moving.
+
+        Only polls while tracing is enabled, and stops as soon as it fires.
+        """
+        if not self.enabled:
+            return
+        import pyglet.clock
+
+        def check(delta_time: float) -> None:
+            player = get_player()
+            if player is not None and player.time > 0:
+                pyglet.clock.unschedule(check)
+                self.mark("first_audio")
+
+        pyglet.clock.schedule_interval(check, interval)
+
+
+def after_first_frame(window: Window, *callbacks: Callable[[], None]) -> None:
+    """Run `callbacks` once the first frame has been drawn, and mark ``first_draw``."""
+    import pyglet.clock
+
+    def run(delta_time: float) -> None:
+        trace.mark("first_draw")
+        for callback in callbacks:
+            callback()
+
+    def on_draw() -> None:
+        window.remove_handler("on_draw", on_draw)
+        # Scheduling puts this after the flip, so the callbacks can't delay the frame itself
+        pyglet.clock.schedule_once(run, 0)
+
+    window.push_handlers(on_draw = on_draw)
+
+
+def path_from_env() -> Path | None:
+    value = os.environ.get(ENV_VAR)
+    if not value:
+        return None
+    if value == "1":
+        from acradio.lib.paths import data_path
+        return data_path / "startup.json"
+    return Path(value)
+
+
+trace = StartupTrace()
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pyglet.media
+from pyglet.media import Player, Source, StreamingSource
+from pyglet.media.codecs import AudioData
+
+from acradio.lib.pcm import MappedWaveSource
+
+__all__ = (
+    'BoundedStream',
+    'open_stream',
+    'play_stream'
+)
+
+DEFAULT_DECODE_AHEAD = 1.0
+
+
+class BoundedStream(StreamingSource):
+    """A streaming source that never decodes more than `max_chunk_bytes` at once.
+
+    The audio driver asks for however much it wants to buffer; this caps each
+    request, so resident PCM for the track stays at roughly the driver's queue
+    plus one chunk however long the file is. `peak_chunk_bytes` and
+    `decoded_bytes` let you check the ceiling is being held.
+    """
+    def __init__(self, source: Source, max_chunk_bytes: int) -> None:
+        super().__init__()
+        self._source = source
+        self.audio_format = source.audio_format
+        self.video_format = None
+        self.info = source.info
+        self._duration = source.duration
+
+        self.max_chunk_bytes = max(1, max_chunk_bytes)
+        if self.audio_format is not None:
+            # Keep whole frames (one sample per channel) so a chunk never ends mid-frame
+            self.max_chunk_bytes = max(self.audio_format.bytes_per_frame, self.audio_format.align(self.max_chunk_bytes))
+        self.peak_chunk_bytes = 0
+        self.decoded_bytes = 0
+        self._primed: AudioData | None = None
+
+    def prime(self) -> None:
+        """Decode the first chunk now, so the player can start without waiting on the decoder.
+
+        Safe to call from a worker thread before the stream is queued on a player.
+        """
+        if self._primed is None:
+            self._primed = self.get_audio_data(self.max_chunk_bytes)
+
+    def get_audio_data(self, num_bytes: int, compensation_time: float = 0.0) -> AudioData | None:
+        if self._primed is not None:
+            data, self._primed = self._primed, None
+            return data
+        data = self._source.get_audio_data(min(num_bytes, self.max_chunk_bytes), compensation_time)
+        if data is not None:
+            self.peak_chunk_bytes = max(self.peak_chunk_bytes, data.length)
+            self.decoded_bytes += data.length
+        return data
+
+    def seek(self, timestamp: float) -> None:
+        self._primed = None
+        self._source.seek(timestamp)
+
+    def delete(self) -> None:
+        self._source.delete()
+
+
+def open_stream(path: Path | str, decode_ahead: float = DEFAULT_DECODE_AHEAD) -> StreamingSource:
+    """
+    Open an audio file for streaming playback.
+
+    Plain PCM WAV files (like the transcoded cache) are memory-mapped instead of
+    decoded; everything else goes through pyglet's decoders, in bounded chunks.
+
+    Args:
+        path: The file to open.
+        decode_ahead: The most audio, in seconds, to decode in one go.
+    """
+    if Path(path).suffix.lower() == ".wav":
+        try:
+            return MappedWaveSource(path)
+        except ValueError:
+            pass
+    source = pyglet.media.load(str(path), streaming=True)
+    bytes_per_second = source.audio_format.bytes_per_second if source.audio_format is not None else 0
+    return BoundedStream(source, int(bytes_per_second * decode_ahead))
+
+
+def play_stream(path: Path | str, volume: float = 1.0, *, loop: bool = False, decode_ahead: float = DEFAULT_DECODE_AHEAD) -> Player:
+    """
+    Stream an audio file on a new `Player`.
+
+    Looping seeks the stream back to the start rather than keeping the decoded file around.
+
+    Args:
+        path: The file to play.
+        volume: The player volume, 0 to 1.
+        loop: Whether to loop the track.
+        decode_ahead: The most audio, in seconds, to decode in one go.
+    """
+    player = Player()
+    player.queue(open_stream(path, decode_ahead))
+    player.volume = volume
+    player.loop = loop
+    player.play()
+    return player
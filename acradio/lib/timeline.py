@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+from collections.abc import Callable
+from typing import overload
+
+import numpy as np
+
+__all__ = (
+    'Timeline',
+    'Envelope'
+)
+
+
+def _envelope_value(t: float, fade_in: float, hold: float, fade_out: float, min_val: float, max_val: float) -> float:
+    """The same curve as `Fader.value`, for one envelope `t` seconds after activation."""
+    if t < 0:
+        return min_val
+    if t < fade_in:
+        return min_val + (max_val - min_val) * (t / fade_in)
+    if t < fade_in + hold:
+        return max_val
+    if t < fade_in + hold + fade_out:
+        return max_val - (max_val - min_val) * ((t - fade_in - hold) / fade_out)
+    return min_val
+
+
+# Order of `Envelope.curve`
+_CURVE = ("min_val", "max_val", "fade_in", "hold", "fade_out")
+
+
+class _Param:
+    """An envelope parameter that's written through to the timeline while the envelope is running."""
+    def __set_name__(self, owner: type, name: str) -> None:
+        self.index = _CURVE.index(name)
+
+    @overload
+    def __get__(self, envelope: None, owner: type | None = None) -> _Param: ...
+    @overload
+    def __get__(self, envelope: Envelope, owner: type | None = None) -> float: ...
+    def __get__(self, envelope: Envelope | None, owner: type | None = None) -> _Param | float:
+        if envelope is None:
+            return self
+        return envelope.curve[self.index]
+
+    def __set__(self, envelope: Envelope, value: float) -> None:
+        envelope.curve[self.index] = value
+        if envelope.active:
+            envelope.timeline.write(envelope)
+
+
+class Envelope:
+    """A fade in / hold / fade out curve living on a `Timeline`.
+
+    Works like a `Fader` whose clock is the timeline's: `activate` starts it,
+    `value` reads it, and there's no per-envelope `update`. Once an envelope has
+    faded out it leaves the timeline and reads `min_val` until it's activated again.
+
+    An envelope is just a handle; while it runs, its state is in the timeline's
+    arrays, at `slot`. `curve` holds its parameters in the order the timeline
+    reads them.
+    """
+    def __init__(self, timeline: Timeline, min_val: float, max_val: float, fade_in: float, hold: float, fade_out: float,
+                 wrap: Callable[[float], float] | None = None) -> None:
+        self.timeline = timeline
+        self.curve = [min_val, max_val, fade_in, hold, fade_out]
+        self.wrap = wrap
+        self.last_activation_time = float("-inf")
+        # Set by the timeline; -1 while the envelope isn't running
+        self.slot = -1
+
+    @property
+    def active(self) -> bool:
+        return self.slot >= 0
+
+    min_val = _Param()
+    max_val = _Param()
+    fade_in = _Param()
+    hold = _Param()
+    fade_out = _Param()
+
+    @property
+    def fade_out_end(self) -> float:
+        _, _, fade_in, hold, fade_out = self.curve
+        return self.last_activation_time + fade_in + hold + fade_out
+
+    def activate(self, time: float | None = None) -> None:
+        """Start the envelope at `time` on the timeline's clock (now, by default)."""
+        self.last_activation_time = self.timeline.time if time is None else time
+        self.timeline.add(self)
+
+    def stop(self) -> None:
+        """Take the envelope off the timeline early. It reads `min_val` afterwards."""
+        self.timeline.remove(self)
+
+    @property
+    def value(self) -> float:
+        v = self.timeline.values[self.slot] if self.slot >= 0 else self.curve[0]
+        return v if self.wrap is None else self.wrap(v)
+
+
+# Rows of `Timeline.params`
+_START, _RISE_ORIGIN, _RISE_RATE, _END, _FALL_RATE, _MIN, _SPAN = range(7)
+# Stands in for an instant fade; big enough that any positive time left clips to fully faded in
+_INSTANT = 1e300
+
+
+class Timeline:
+    """Advances every active `Envelope` in one vectorized step.
+
+    Envelope parameters live in parallel numpy arrays, packed so the first
+    `len(self)` slots are the active ones: `params` holds each one's curve,
+    `values` its current value, and `owners` the `Envelope` in that slot.
+    `update` moves the clock and recomputes all of the values at once, then
+    drops any envelopes that have finished. Call it once a frame, before
+    reading values.
+
+    Each envelope is stored as a rising and a falling ramp, each clipped to
+    0..1; its level is the lower of the two. That's the fade in / hold / fade
+    out curve with no branching, so a step is a handful of array operations
+    however many envelopes are running.
+    """
+    def __init__(self, capacity: int = 16) -> None:
+        self.time = 0.0
+        self._count = 0
+        self.owners: list[Envelope | None] = [None] * capacity
+        self.params = np.zeros((7, capacity), dtype = np.float64)
+        # A list, not an array, so reading one value is a plain index
+        self.values: list[float] = [0.0] * capacity
+
+    def __len__(self) -> int:
+        return self._count
+
+    def envelope(self, min_val: float, max_val: float, fade_in: float, hold: float, fade_out: float,
+                 wrap: Callable[[float], float] | None = None) -> Envelope:
+        """Make an envelope on this timeline. It does nothing until it's activated."""
+        return Envelope(self, min_val, max_val, fade_in, hold, fade_out, wrap)
+
+    def _grow(self) -> None:
+        capacity = len(self.owners) * 2
+        self.owners.extend([None] * (capacity - len(self.owners)))
+        self.params = np.pad(self.params, ((0, 0), (0, capacity - self.params.shape[1])))
+        self.values.extend([0.0] * (capacity - len(self.values)))
+
+    def write(self, envelope: Envelope) -> None:
+        """Copy a running envelope's parameters into its slot."""
+        start = envelope.last_activation_time
+        min_val, max_val, fade_in, hold, fade_out = envelope.curve
+        column = self.params[:, envelope.slot]
+        column[_START] = start
+        if fade_in > 0:
+            column[_RISE_ORIGIN], column[_RISE_RATE] = start, 1 / fade_in
+        else:
+            # Already fully up at the start itself
+            column[_RISE_ORIGIN], column[_RISE_RATE] = start - 1, 1
+        column[_END] = start + fade_in + hold + fade_out
+        column[_FALL_RATE] = 1 / fade_out if fade_out > 0 else _INSTANT
+        column[_MIN] = min_val
+        column[_SPAN] = max_val - min_val
+        # So a fresh activation reads right before the next update
+        self.values[envelope.slot] = _envelope_value(self.time - start, fade_in, hold, fade_out, min_val, max_val)
+
+    def add(self, envelope: Envelope) -> None:
+        """Give `envelope` a slot if it hasn't got one, and (re)write its parameters there."""
+        if envelope.slot < 0:
+            if self._count == len(self.owners):
+                self._grow()
+            envelope.slot = self._count
+            self.owners[self._count] = envelope
+            self._count += 1
+        self.write(envelope)
+
+    def remove(self, envelope: Envelope) -> None:
+        """Free `envelope`'s slot, if it has one."""
+        slot = envelope.slot
+        if slot < 0:
+            return
+        # Move the last active envelope into the hole to keep the arrays packed
+        last = self._count - 1
+        if slot != last:
+            moved = self.owners[last]
+            self.params[:, slot] = self.params[:, last]
+            self.values[slot] = self.values[last]
+            self.owners[slot] = moved
+            moved.slot = slot
+        self.owners[last] = None
+        self._count = last
+        envelope.slot = -1
+
+    def update(self, delta_time: float) -> None:
+        self.time += delta_time
+        n = self._count
+        if not n:
+            return
+
+        time = self.time
+        start, rise_origin, rise_rate, end, fall_rate, lo, span = self.params[:, :n]
+        rise = (time - rise_origin) * rise_rate
+        fall = (end - time) * fall_rate
+        level = np.minimum(rise, fall, out = rise)
+        np.clip(level, 0.0, 1.0, out = level)
+        level *= start <= time
+        level *= span
+        level += lo
+        self.values[:n] = level.tolist()
+
+        finished = np.flatnonzero(end <= time)
+        # Highest slot first, so removing one never moves another that's still to go
+        for slot in finished[::-1].tolist():
+            self.remove(self.owners[slot])
+
+    def clear(self) -> None:
+        for envelope in self.owners[:self._count]:
+            envelope.slot = -1
+        self.owners[:self._count] = [None] * self._count
+        self._count = 0
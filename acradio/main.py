@@ -1,15 +1,66 @@
-from acradio.lib.application import Window
-from acradio.views.root import RootView
-from resources import load_otf_font, load_font
+import argparse
+import threading
+from pathlib import Path
+
+from acradio.lib.startup import after_first_frame, path_from_env, trace
+
+with trace.phase("imports"):
+    from acradio.core.settings import settings_service
+    from acradio.lib.application import Window
+    from acradio.lib.fonts import require_font
+    from acradio.views.root import RootView, clock_font_files
+
+# Loading another weight of the clock face's family later could change the face mid-run,
+# so all of them go in before the first frame
+CRITICAL_FONTS = clock_font_files
+
+def load_all_fonts() -> None:
+    # Only the debug overlay uses this, and it's a family of its own
+    require_font("gohu", otf = False)
+
+# Enough to catch up over a few launches without taking cores from playback and rendering;
+# `python -m acradio.core.transcode` builds with every core but one
+PCM_BUILD_WORKERS = 1
+PCM_BUILD_NICE = 10
+
+def start_pcm_build() -> None:
+    """Bring the transcoded music cache up to date on a background thread, with one low priority worker.
+
+    Only runs with a ``pcm_cache_mb`` budget in settings.json, and stops once the copies fill it.
+    Tracks switch over to their copies as they're finished; until then they play from the originals.
+    """
+    pcm_cache = settings_service.pcm_cache
+    budget = settings_service.snapshot.pcm_cache_bytes
+    if pcm_cache is not None and budget > 0:
+        threading.Thread(target = pcm_cache.build, args = (PCM_BUILD_WORKERS,),
+                         kwargs = {"nice": PCM_BUILD_NICE, "budget": budget},
+                         name = "PCMBuild", daemon = True).start()
 
 def main() -> None:
-    load_font("gohu")
-    load_otf_font("Seurat Pro B")
-    load_otf_font("Seurat Pro UB")
-    load_otf_font("Seurat Pro DB")
+    parser = argparse.ArgumentParser(prog = "acradio")
+    parser.add_argument("--trace-startup", metavar = "PATH", type = Path, nargs = "?", const = Path("startup.json"),
+                        help = "write startup phase timings to PATH as JSON")
+    parser.add_argument("--eager", action = "store_true",
+                        help = "load every font before opening the window instead of on first use")
+    args = parser.parse_args()
+
+    trace_path = args.trace_startup or path_from_env()
+    if trace_path is not None:
+        trace.enable(trace_path)
+        trace.expect("first_draw", "first_audio")
+
+    with trace.phase("fonts"):
+        for font in CRITICAL_FONTS:
+            require_font(font)
+        if args.eager:
+            load_all_fonts()
 
-    win = Window()
-    root = RootView()
+    with trace.phase("Window()"):
+        win = Window()
+    with trace.phase("RootView()"):
+        root = RootView()
 
     win.show_view(root)
+    after_first_frame(win, root.warm_glyphs, start_pcm_build)
+    trace.watch_first_audio(lambda: root.music.player)
     win.run()
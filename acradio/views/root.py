@@ -1,185 +1,315 @@
-import json
+import os
 
 import arcade
 import arrow
 
-from arcade import Sound, Text, color
-from arcade.types import Color
-from pyglet.media import Player
+from arcade import Text, color
+from pyglet.graphics import Batch
 
-from acradio.core.background import GradientRect, gradients
+from acradio.core.background import SkyRect
 from acradio.core.music import State, choose_track
-from acradio.core.weather import get_weather
+from acradio.core.settings import Settings, settings_service
+from acradio.core.playback import TrackPlayer
+from acradio.core.weather import Weather, WeatherCache, WeatherService
 from acradio.lib.application import View
-from acradio.lib.fader import Fader
-from acradio.lib.draw_grad_rect import draw_rect_gradient
-from acradio.lib.paths import settings_path
+from acradio.lib.audio_cache import DecodedAudioCache
+from acradio.lib.label import Label
+from acradio.lib.fonts import GlyphCache, GlyphSet, require_font
+from acradio.lib.paths import data_path, weather_cache_path
+from acradio.lib.profiling import FrameTimer
+from acradio.lib.scheduler import Scheduler
+from acradio.lib.startup import trace
+from acradio.lib.streaming import BoundedStream
+from acradio.lib.timeline import Timeline
 
 day_names = ["Sun", "Mon", "Tue", "Wed", "Thu", "Fri", "Sat"]
 
+# Every label asks for "FOT-Seurat Pro" at its default weight, which pyglet resolves across
+# every weight loaded under that family, so the face drawn depends on all of these files
+clock_font_files = ("Seurat Pro B", "Seurat Pro DB")
+
 
 class RootView(View):
 
     def __init__(self):
         super().__init__()
 
-        with open(settings_path) as fp:
-            settings = json.load(fp)
+        self.settings = settings_service.snapshot
 
         self.state = State(0, 0, 0, 0, "none")
-        self.location = settings["location"]
+        self.location = self.settings.location
+        self.audio_cache = DecodedAudioCache(self.settings.audio_cache_bytes)
 
         self.local_time = 0
         self.last_time_refresh = 0
         self.last_weather_refresh = 0
 
-        self.time_refresh_interval = 1
         self.weather_refresh_interval = 600
+        self.weather_service = WeatherService(cache = WeatherCache(weather_cache_path, self.weather_refresh_interval))
+        self.scheduler = Scheduler(self.on_minute, self.on_weather, self.weather_refresh_interval)
 
         self.current_track = None
 
-        self.player: Player = None
-        self.get_ready_to_die = False
-        self.got_ready_to_die_time = 0
-
         self.volume = 0.20
         self.debug = False
+        # Set ACRADIO_PROFILE to start with frame timing on; F3 toggles it and F4 dumps it
+        self.timer = FrameTimer(enabled = bool(os.environ.get("ACRADIO_PROFILE")))
+        self.timings_path = data_path / "frame_times.jsonl"
+
+        # Every fade in the view runs on this, stepped once per update
+        self.animations = Timeline()
+
+        self.music = TrackPlayer(self.volume, self.settings.crossfade, self.settings.decode_ahead, self.audio_cache,
+                                 self.settings.library, self.animations)
 
-        self.volume_fader = Fader(0, 255, 0, 1, 1, int)
+        self.volume_fader = self.animations.envelope(0, 255, 0, 1, 1, int)
 
-        self.background = GradientRect(self.window.rect, gradients[0])
+        self.background = SkyRect(self.window.rect)
 
-        self.debug_text = Text("[NOT UPDATED]", x = 5, y = self.window.height - 5, anchor_y = "top",
-                              font_name = "GohuFont 11 Nerd Font Mono", font_size = 11,
-                              color = color.WHITE,
-                              width = self.window.width,
-                              multiline = True)
+        # Every label lives in one batch so all the text is a single draw
+        self.text_batch = Batch()
 
-        self.time_text = Text("??:??", x = self.window.center_x, y = self.window.center_y,
+        # Made the first time the overlay is shown, so its font isn't loaded until then
+        self.debug_text: Label | None = None
+
+        self.time_text = Label(Text("??:??", x = self.window.center_x, y = self.window.center_y,
                               anchor_x = "center",
                               align = "center",
                               font_name = "FOT-Seurat Pro", font_size = 100,
-                              color = color.WHITE)
+                              color = color.WHITE, batch = self.text_batch))
 
-        self.date_text = Text("Day MM/DD", x = self.time_text.right, y = self.time_text.bottom + 10,
+        self.date_text = Label(Text("Day MM/DD", x = self.time_text.right, y = self.time_text.bottom + 10,
                               anchor_y = "top", anchor_x = "right",
                               align = "right",
                               font_name = "FOT-Seurat Pro", font_size = 24,
-                              color = color.WHITE)
+                              color = color.WHITE, batch = self.text_batch))
 
-        self.weather_text = Text("Weather", x = self.time_text.left, y = self.time_text.bottom + 10,
+        self.weather_text = Label(Text("Weather", x = self.time_text.left, y = self.time_text.bottom + 10,
                               anchor_y = "top", anchor_x = "left",
                               align = "left",
                               font_name = "FOT-Seurat Pro", font_size = 24,
-                              color = color.WHITE)
+                              color = color.WHITE, batch = self.text_batch))
 
-        self.volume_text = Text("Volume 40%", x = self.window.center_x, y = self.window.height - 10,
+        self.volume_text = Label(Text("Volume 40%", x = self.window.center_x, y = self.window.height - 10,
                               anchor_y = "top", anchor_x = "center",
                               align = "center",
                               font_name = "FOT-Seurat Pro", font_size = 24,
-                              color = color.WHITE)
+                              color = color.WHITE, batch = self.text_batch))
 
-        self.setup()
+        self.glyph_cache = GlyphCache()
 
-    def update_track(self) -> None:
-        _current_track = self.current_track
-        self.current_track = choose_track(self.state)
+        # Keep the window at full rate while anything is fading
+        self.window.keep_awake.append(self.animating)
 
-        if self.player is None:
-            sound = Sound(self.current_track)
-            self.player = sound.play(volume = self.volume, loop = True)
-            return
+        settings_service.subscribe(self.on_settings_changed)
+        settings_service.watch()
 
-        if _current_track != self.current_track:
-            self.get_ready_to_die = True
-            self.got_ready_to_die_time = self.player.time
+        self.setup()
 
-        if self.get_ready_to_die and self.player.time > self.got_ready_to_die_time:
-            self.player.delete()
-            self.player = None
+    def update_track(self) -> None:
+        self.current_track = choose_track(self.state, self.settings.track_index)
+        self.music.play(self.current_track)
+
+    def preroll_track(self) -> None:
+        """Start opening the track for the next minute, so the switch doesn't stall."""
+        upcoming = arrow.now().shift(minutes = 1).datetime
+        state = State(upcoming.month, upcoming.day, upcoming.hour, upcoming.minute, self.state.weather)
+        try:
+            self.music.preroll(choose_track(state, self.settings.track_index))
+        except ValueError:
+            pass
 
     def get_weather(self) -> None:
-        weather = get_weather(self.location)
+        """Start a background weather refresh. The result is applied by `apply_weather`."""
+        self.weather_service.refresh(self.location)
+
+    def load_weather(self) -> bool:
+        """Show the last known weather for the location, and fetch it if that's stale. Returns whether the state changed."""
+        fresh = self.weather_service.load_cached(self.location)
+        changed = self.apply_weather(self.weather_service.current)
+        if not fresh:
+            self.get_weather()
+        return changed
+
+    def apply_weather(self, weather: str) -> bool:
+        """Update the state with new weather. Returns whether the state changed."""
+        self.last_weather_refresh = self.local_time
+        if weather == self.state.weather:
+            return False
         self.state = State(self.state.month, self.state.day, self.state.hour, self.state.minute, weather)
         self.weather_text.text = weather.title()
-        self.last_weather_refresh = self.local_time
+        self.invalidate()
+        return True
 
-    def get_time(self) -> None:
+    def get_time(self) -> bool:
+        """Refresh the clock. Returns whether the state changed."""
         now = arrow.now().datetime
+        self.last_time_refresh = self.local_time
         month = now.month
         day = now.day
         hour = now.hour
         minute = now.minute
+        if (month, day, hour, minute) == (self.state.month, self.state.day, self.state.hour, self.state.minute):
+            return False
         day_name = day_names[now.weekday()]
         self.state = State(month, day, hour, minute, self.state.weather)
         self.time_text.text = f"{hour:02}:{minute:02}"
         self.date_text.text = f"{day_name} {month}/{day:02}"
-        self.background = GradientRect(self.window.rect, gradients[hour])
-        self.last_time_refresh = self.local_time
+        self.background.minute = hour * 60 + minute
+        self.invalidate()
+        return True
+
+    def on_minute(self) -> None:
+        with self.timer["get_time"]:
+            changed = self.get_time()
+        if changed:
+            with self.timer["update_track"]:
+                self.update_track()
+        self.preroll_track()
+
+    def on_weather(self) -> None:
+        with self.timer["get_weather"]:
+            self.get_weather()
 
     def setup(self) -> None:
+        with trace.phase("RootView.setup"):
+            self._setup()
+
+    def _setup(self) -> None:
         self.local_time = 0
         self.get_time()
-        self.get_weather()
+        # Start with the last known weather; a fresh value (if needed) arrives through on_update
+        self.load_weather()
 
         self.update_track()
+        self.preroll_track()
+        self.scheduler.start()
 
     def on_update(self, delta_time: float) -> bool | None:
-        self.local_time += delta_time
-        self.volume_fader.update(delta_time)
-
-        if self.local_time >= self.last_time_refresh + self.time_refresh_interval:
-            self.get_time()
-
-        if self.local_time >= self.last_weather_refresh + self.weather_refresh_interval:
-            self.get_weather()
-
-        self.update_track()
-        self.update_debug_text()
+        with self.timer["on_update"]:
+            self.local_time += delta_time
+            with self.timer["animations"]:
+                self.animations.update(delta_time)
+            self.music.update(delta_time)
+
+            with self.timer["poll_weather"]:
+                weather = self.weather_service.poll()
+            if weather is not None and self.apply_weather(weather):
+                with self.timer["update_track"]:
+                    self.update_track()
+
+            if self.debug_text is not None:
+                with self.timer["update_debug_text"]:
+                    self.debug_text.update(self.format_debug_text)
+
+    def animating(self) -> bool:
+        """Whether anything on screen or in the mix is changing frame to frame."""
+        # The debug overlay shows local time, so it counts as animating
+        return len(self.animations) > 0 or self.music.fading or self.debug
 
     def reset(self) -> None:
-        self.player.delete()
-        self.player = None
-        with open(settings_path) as fp:
-            settings = json.load(fp)
+        self.scheduler.stop()
+        self.music.stop()
+        # Pick up any edits the watcher hasn't seen yet; this only re-parses if the file changed
+        settings_service.check()
         self.state = State(0, 0, 0, 0, "none")
-        self.location = settings["location"]
         self.setup()
 
+    def apply_settings(self, settings: Settings) -> None:
+        self.settings = settings
+        self.location = settings.location
+        self.music.decode_ahead = settings.decode_ahead
+        self.music.crossfade = settings.crossfade
+        self.music.library = settings.library
+        self.audio_cache.budget = settings.audio_cache_bytes
+
+    def on_settings_changed(self, old: Settings, new: Settings) -> None:
+        self.apply_settings(new)
+        self.invalidate()
+        weather_changed = new.location != old.location and self.load_weather()
+        if weather_changed or new.track_index is not old.track_index:
+            self.update_track()
+            self.preroll_track()
+
+    def on_resize(self, width: int, height: int) -> bool | None:
+        self.background.rect = self.window.rect
+
     def on_key_press(self, symbol: int, modifiers: int) -> bool | None:
         if symbol == arcade.key.R:
             self.reset()
         elif symbol == arcade.key.GRAVE:
             self.debug = not self.debug
+            self.get_debug_text().visible = self.debug
+        elif symbol == arcade.key.F3:
+            self.timer.toggle()
+        elif symbol == arcade.key.F4:
+            self.timer.dump(self.timings_path)
         elif symbol == arcade.key.MINUS:
             self.volume -= 0.05
             self.volume = max(self.volume, 0)
             self.volume_text.text = f"Volume {self.volume * 2:.0%}"
-            self.player.volume = self.volume
-            self.volume_fader.activate(self.local_time)
+            self.music.volume = self.volume
+            self.volume_fader.activate()
         elif symbol == arcade.key.EQUAL:
             self.volume += 0.05
             self.volume = min(self.volume, 1)
             self.volume_text.text = f"Volume {self.volume * 2:.0%}"
-            self.player.volume = self.volume
-            self.volume_fader.activate(self.local_time)
-
-    def update_debug_text(self) -> None:
-        self.debug_text.text = f"{self.state.month}/{self.state.day} {self.state.hour}:{self.state.minute}\nLocation: {self.location}\nWeather: {self.state.weather}\n\nLocal Time: {self.local_time}\nLast Time Update: {self.last_time_refresh}\nLast Weather Update: {self.last_weather_refresh}\n\nCurrent Track: {self.current_track}\nVolume: {self.volume:.0%}"
+            self.music.volume = self.volume
+            self.volume_fader.activate()
+
+    def get_debug_text(self) -> Label:
+        if self.debug_text is None:
+            require_font("gohu", otf = False)
+            self.debug_text = Label(Text("[NOT UPDATED]", x = 5, y = self.window.height - 5, anchor_y = "top",
+                                  font_name = "GohuFont 11 Nerd Font Mono", font_size = 11,
+                                  color = color.WHITE,
+                                  width = self.window.width,
+                                  multiline = True, batch = self.text_batch), visible = False)
+        return self.debug_text
+
+    def glyph_sets(self) -> list[GlyphSet]:
+        """Every character the clock face can show. The date, weather and volume labels share one font."""
+        digits = "0123456789"
+        small = digits + "/% " + "".join(day_names) + "".join(weather.title() for weather in Weather) + "Volume"
+        return [
+            GlyphSet(self.time_text.text_object, digits + ":?", clock_font_files),
+            GlyphSet(self.date_text.text_object, small, clock_font_files)
+        ]
+
+    def warm_glyphs(self) -> None:
+        """Get the clock face's glyphs into the font atlases now, rather than mid-frame the first time each is drawn."""
+        with trace.phase("glyph warm-up"):
+            self.glyph_cache.warm(self.glyph_sets())
+
+    def format_debug_text(self) -> str:
+        # Rounded times keep the overlay from relaying out on every single frame
+        text = f"{self.state.month}/{self.state.day} {self.state.hour}:{self.state.minute}\nLocation: {self.location}\nWeather: {self.state.weather}\n\nLocal Time: {self.local_time:.1f}\nLast Time Update: {self.last_time_refresh:.1f}\nLast Weather Update: {self.last_weather_refresh:.1f}\n\nCurrent Track: {self.current_track}\nVolume: {self.volume:.0%}"
+        if self.settings.library is not None and self.current_track is not None:
+            duration = self.settings.library.duration(self.current_track)
+            if duration is not None:
+                text += f" ({duration // 60:.0f}:{duration % 60:02.0f})"
+        if self.settings.missing_tracks:
+            text += f"\nMissing Tracks: {len(self.settings.missing_tracks)}"
+        source = self.music.player.source if self.music.player is not None else None
+        if isinstance(source, BoundedStream):
+            text += f"\nStream Chunk: {source.peak_chunk_bytes / 1024:.0f}/{source.max_chunk_bytes / 1024:.0f} KiB"
+        cache = self.audio_cache.stats
+        text += f"\nAudio Cache: {cache.hits} hit / {cache.misses} miss, {cache.entries} tracks, {cache.bytes / 2**20:.0f}/{cache.budget / 2**20:.0f} MiB"
+        if self.timer.enabled:
+            text += "\n\n" + self.timer.format()
+        return text
 
     def on_draw(self) -> None:
-        self.clear()
-
-        self.background.draw()
+        with self.timer["on_draw"]:
+            self.clear()
 
-        self.time_text.draw()
-        self.date_text.draw()
-        self.weather_text.draw()
+            with self.timer["background"]:
+                self.background.draw()
 
-        volume_alpha = self.volume_fader.value
-        self.volume_text.color = self.volume_text.color.replace(a = volume_alpha)
-        if volume_alpha > 0:
-            self.volume_text.draw()
+            with self.timer["volume_fader"]:
+                volume_alpha = self.volume_fader.value
+                self.volume_text.alpha = volume_alpha
+                self.volume_text.visible = volume_alpha > 0
 
-        if self.debug:
-            self.debug_text.draw()
+            with self.timer["text"]:
+                self.text_batch.draw()
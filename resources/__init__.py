@@ -1,6 +1,7 @@
-from collections.abc import Sequence
+from collections.abc import Callable, Sequence
 import json
-from resources.filefactory import make_file_opener, make_path_finder, make_string_opener
+from weakref import WeakKeyDictionary
+from resources.filefactory import make_binary_opener, make_file_opener, make_path_finder, make_string_opener, manifest
 from arcade import (
     ArcadeContext,
     Sound,
@@ -14,12 +15,6 @@ from arcade import (
 from arcade.hitbox import HitBoxAlgorithm
 from arcade.gl import Program
 
-import resources.audio as audio
-import resources.data as data
-import resources.fonts as fonts
-import resources.images as images
-import resources.shaders as shaders
-
 __all__ = (
     'read_shader',
     'load_program',
@@ -31,15 +26,20 @@ __all__ = (
     'load_wav',
     'load_ogg',
     'get_font_path',
+    'read_font',
     'load_font',
     'read_json',
     'open_json',
     'load_json',
-    'dump_json'
+    'dump_json',
+    'manifest'
 )
 
 # Shader methods
-read_shader = make_string_opener(shaders, 'glsl')
+read_shader = make_string_opener('shaders', 'glsl')
+
+# Linked programs per context, keyed by everything that goes into linking them
+_programs: WeakKeyDictionary[ArcadeContext, dict[tuple, Program]] = WeakKeyDictionary()
 
 
 def load_program(
@@ -54,11 +54,19 @@ def load_program(
         common: list[str] | None = None,
         defines: dict[str, str] | None = None,
         varyings: Sequence[str] | None = None,
-        varyings_capture_mode: str = "interleaved"
+        varyings_capture_mode: str = "interleaved",
+        make_program: Callable[..., Program] | None = None
     ) -> Program:
     """
     Load a glsl shader program by providing the names for the required shaders.
 
+    Asking again for the same shaders, common sources, defines and varyings in the
+    same context returns the same Program rather than compiling and linking again.
+
+    `make_program` builds the Program when it isn't cached yet. It takes the same
+    keyword arguments as `ctx.program`, which is the default; pass a wrapper that
+    can load linked binaries from disk to skip compiling across runs too.
+
     Returns:
         an Arcade gl Program for use with gl Geometry.
     """
@@ -68,7 +76,19 @@ def load_program(
     tess_control = None if tess_control_shader is None else read_shader(tess_control_shader, sub_directories)
     tess_evaluation = None if tess_evaluation_shader is None else read_shader(tess_evaluation_shader, sub_directories)
 
-    return ctx.program(
+    key = (
+        vertex, fragment, geometry, tess_control, tess_evaluation,
+        tuple(common or ()),
+        tuple(sorted((name, str(value)) for name, value in (defines or {}).items())),
+        None if varyings is None else tuple(varyings),
+        varyings_capture_mode
+    )
+    programs = _programs.setdefault(ctx, {})
+    program = programs.get(key)
+    if program is not None:
+        return program
+
+    program = programs[key] = (ctx.program if make_program is None else make_program)(
         vertex_shader=vertex,
         fragment_shader=fragment,
         geometry_shader=geometry,
@@ -79,10 +99,11 @@ def load_program(
         varyings=varyings,
         varyings_capture_mode=varyings_capture_mode
     )
+    return program
 
 
 # Texture methods
-get_png_path = make_path_finder(images, 'png')
+get_png_path = make_path_finder('images', 'png')
 def load_png(name: str, sub_directories: tuple[str, ...] = (), *, hit_box_algorithm: HitBoxAlgorithm | None = None, hash: str | None = None) -> Texture:
     return _load_texture(get_png_path(name, sub_directories), hit_box_algorithm=hit_box_algorithm, hash=hash)
 
@@ -90,20 +111,23 @@ def load_png_sheet(name: str, sub_durectories: tuple[str, ...] = ()) -> SpriteSh
 
 
 # Sound Methods
-get_wav_path = make_path_finder(audio, 'wav')
-get_ogg_path = make_path_finder(audio, 'ogg')
-def load_wav(name: str, streaming: bool = False, sub_directories: tuple[str, ...] = ()) -> Sound: return _load_sound(get_wav_path(str, sub_directories), streaming)
-def load_ogg(name: str, streaming: bool = False, sub_directories: tuple[str, ...] = ()) -> Sound: return _load_sound(get_ogg_path(str, sub_directories), streaming)
+get_wav_path = make_path_finder('audio', 'wav')
+get_ogg_path = make_path_finder('audio', 'ogg')
+def load_wav(name: str, streaming: bool = False, sub_directories: tuple[str, ...] = ()) -> Sound: return _load_sound(get_wav_path(name, sub_directories), streaming)
+def load_ogg(name: str, streaming: bool = False, sub_directories: tuple[str, ...] = ()) -> Sound: return _load_sound(get_ogg_path(name, sub_directories), streaming)
 
 # Font Methods
-get_font_path = make_path_finder(fonts, 'ttf')
+get_font_path = make_path_finder('fonts', 'ttf')
 def load_font(name: str, sub_directories: tuple[str, ...] = ()) -> None: _load_font(get_font_path(name, sub_directories))
-get_font_path_otf = make_path_finder(fonts, 'otf')
+get_font_path_otf = make_path_finder('fonts', 'otf')
 def load_otf_font(name: str, sub_directories: tuple[str, ...] = ()) -> None: _load_font(get_font_path_otf(name, sub_directories))
+# Memory-mapped, for when the bytes themselves are wanted (hashing, font caches)
+read_font = make_binary_opener('fonts', 'ttf')
+read_otf_font = make_binary_opener('fonts', 'otf')
 
 # Data Methods
-read_json = make_string_opener(data, 'json')
-open_json = make_file_opener(data, 'json')
+read_json = make_string_opener('data', 'json')
+open_json = make_file_opener('data', 'json')
 def load_json(name: str, sub_directories: tuple[str, ...] = ()) -> dict: return json.loads(read_json(name, sub_directories))
 def dump_json(name: str, data: dict, sub_directoreis: tuple[str, ...] = ()) -> None:
     with open_json(name, sub_directoreis, 'w') as fp:
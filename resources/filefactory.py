@@ -1,13 +1,21 @@
 from typing import IO as _IO
-from collections.abc import Callable
+from collections.abc import Buffer, Callable
 from pathlib import Path
-from importlib.resources import Package
-from contextlib import contextmanager
+from contextlib import ExitStack, contextmanager
+from functools import lru_cache
+import atexit
 import importlib.resources as pkg
-
-Anchor = Package
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
 
 __all__ = (
+    "Manifest",
+    "manifest",
+    "pack_bundle",
     "make_file_opener",
     "make_string_opener",
     "make_binary_opener",
@@ -16,6 +24,181 @@ __all__ = (
 
 
 type IO = _IO[bytes] | _IO[str]
+# The top level folder in the resources package, e.g. 'fonts' or 'shaders'
+type Anchor = str
+# (kind, sub directories, file name)
+type Key = tuple[str, tuple[str, ...], str]
+
+PACKAGE = "resources"
+# A single file holding every resource; when it's there, nothing is walked at startup
+BUNDLE_NAME = "resources.pack"
+BUNDLE_MAGIC = b"ACRP"
+# magic, index length
+_BUNDLE_HEADER = struct.Struct("<4sI")
+# Binaries at least this big are memory-mapped instead of read
+MMAP_THRESHOLD = 256 * 1024
+# How many files each memoized loader keeps
+MEMO_SIZE = 64
+
+
+def _with_extension(name: str, file_extension: str | None) -> str:
+    return name if file_extension is None else name + file_extension
+
+
+def _normalize_extension(file_extension: str | None) -> str | None:
+    # We expect people to not add the dot, but its easier to add then remove
+    if file_extension is not None and not file_extension.startswith('.'):
+        return '.' + file_extension
+    return file_extension
+
+
+class Manifest:
+    """
+    Every file in the resources package, indexed once.
+
+    Lookups are by (kind, name, sub directories), where kind is the top level
+    folder. The package is made available as real files for the manifest's whole
+    lifetime (extracting it if it's zipped), so paths handed out stay valid.
+
+    If the package contains a `BUNDLE_NAME` file (see `pack_bundle`), its index is
+    read instead of walking any directories, file contents are served straight out
+    of the memory-mapped bundle, and paths are extracted on first request.
+    """
+
+    def __init__(self, package: str = PACKAGE) -> None:
+        self._stack = ExitStack()
+        atexit.register(self._stack.close)
+
+        self.files: dict[Key, Path] = {}
+        self.root: Path | None = None
+        self._bundle: mmap.mmap | None = None
+        self._bundle_index: dict[Key, tuple[int, int]] = {}
+        self._extracted: Path | None = None
+
+        root = pkg.files(package)
+        bundle = root.joinpath(BUNDLE_NAME)
+        if bundle.is_file():
+            self._open_bundle(self._stack.enter_context(pkg.as_file(bundle)))
+        else:
+            self.root = self._stack.enter_context(pkg.as_file(root))
+            self._index(self.root)
+
+        self.read_bytes = lru_cache(maxsize = MEMO_SIZE)(self._read_bytes)
+        self.read_text = lru_cache(maxsize = MEMO_SIZE)(self._read_text)
+
+    def _index(self, root: Path) -> None:
+        for kind in os.scandir(root):
+            if not kind.is_dir() or kind.name.startswith(('_', '.')):
+                continue
+            for directory, dirs, files in os.walk(kind.path):
+                dirs[:] = [d for d in dirs if not d.startswith(('_', '.'))]
+                sub_directories = Path(directory).relative_to(kind.path).parts
+                for file in files:
+                    self.files[(kind.name, sub_directories, file)] = Path(directory, file)
+
+    def _open_bundle(self, path: Path) -> None:
+        # Left open for the life of the process; the views handed out point into it
+        with open(path, 'rb') as f:
+            self._bundle = mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ)
+        magic, index_length = _BUNDLE_HEADER.unpack_from(self._bundle)
+        if magic != BUNDLE_MAGIC:
+            raise ValueError(f"{path} isn't a resource bundle")
+        start = _BUNDLE_HEADER.size
+        index = json.loads(self._bundle[start:start + index_length])
+        data_start = start + index_length
+        for rel, (offset, size) in index.items():
+            *parts, file = rel.split('/')
+            self._bundle_index[(parts[0], tuple(parts[1:]), file)] = data_start + offset, size
+
+    def __contains__(self, key: Key) -> bool:
+        return key in self.files or key in self._bundle_index
+
+    def keys(self) -> list[Key]:
+        return [*self.files, *self._bundle_index]
+
+    def find(self, kind: Anchor, file_name: str, sub_directories: tuple[str, ...] = ()) -> Path:
+        """The real path of a resource. Raises `FileNotFoundError` if there's no such file."""
+        key = (kind, tuple(sub_directories), file_name)
+        path = self.files.get(key)
+        if path is not None:
+            return path
+        if key in self._bundle_index:
+            return self._extract(key)
+        raise FileNotFoundError('/'.join((kind, *sub_directories, file_name)))
+
+    def target(self, kind: Anchor, file_name: str, sub_directories: tuple[str, ...] = ()) -> Path:
+        """Where a resource is or would be written. Only possible when the package isn't bundled."""
+        if self.root is None:
+            raise OSError("Resources are bundled and read only")
+        return self.root.joinpath(kind, *sub_directories, file_name)
+
+    def written(self, path: Path) -> None:
+        """Record that `path` (from `target`) was written, so it's found and nothing stale is served."""
+        if self.root is None:
+            raise OSError("Resources are bundled and read only")
+        kind, *sub_directories, file = path.relative_to(self.root).parts
+        self.files[(kind, tuple(sub_directories), file)] = path
+        self.read_bytes.cache_clear()
+        self.read_text.cache_clear()
+
+    def _extract(self, key: Key) -> Path:
+        if self._extracted is None:
+            self._extracted = Path(self._stack.enter_context(tempfile.TemporaryDirectory(prefix = "acradio-resources-")))
+        kind, sub_directories, file = key
+        path = self._extracted.joinpath(kind, *sub_directories, file)
+        path.parent.mkdir(parents = True, exist_ok = True)
+        path.write_bytes(self._bundled(key))
+        self.files[key] = path
+        return path
+
+    def _bundled(self, key: Key) -> memoryview:
+        assert self._bundle is not None
+        offset, size = self._bundle_index[key]
+        return memoryview(self._bundle)[offset:offset + size]
+
+    def _read_bytes(self, kind: Anchor, file_name: str, sub_directories: tuple[str, ...] = ()) -> Buffer:
+        """
+        The contents of a resource. Memoized.
+
+        Bundled resources and big files come back as a read only `memoryview` over a
+        memory map, so nothing is copied; everything else as `bytes`.
+        """
+        key = (kind, tuple(sub_directories), file_name)
+        if key in self._bundle_index:
+            return self._bundled(key)
+        path = self.find(kind, file_name, sub_directories)
+        if path.stat().st_size < MMAP_THRESHOLD:
+            return path.read_bytes()
+        with open(path, 'rb') as f:
+            return memoryview(mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ))
+
+    def _read_text(self, kind: Anchor, file_name: str, sub_directories: tuple[str, ...] = (), encoding: str = 'utf-8') -> str:
+        """The contents of a resource as text. Memoized."""
+        return str(self.read_bytes(kind, file_name, sub_directories), encoding)
+
+
+manifest = Manifest()
+
+
+def pack_bundle(source: Manifest = manifest) -> bytes:
+    """
+    Pack every resource in `source` into the contents of a single bundle file.
+
+    Write the result into the resources package as `BUNDLE_NAME` and the
+    manifest will use it instead of the individual files.
+    """
+    # Offsets are from the end of the index, so the index doesn't have to know its own length
+    index: dict[str, tuple[int, int]] = {}
+    blobs: list[Buffer] = []
+    offset = 0
+    for kind, sub_directories, file in source.keys():
+        data = source.read_bytes(kind, file, sub_directories)
+        index['/'.join((kind, *sub_directories, file))] = offset, len(data)
+        blobs.append(data)
+        offset += len(data)
+    index_bytes = json.dumps(index).encode()
+
+    return b''.join((_BUNDLE_HEADER.pack(BUNDLE_MAGIC, len(index_bytes)), index_bytes, *blobs))
 
 
 def make_file_opener(
@@ -35,16 +218,13 @@ def make_file_opener(
 
     See `open` for other arguments
 
-    :param anchor: The location to open at, as a module from `import <x>`.
+    :param anchor: The folder to open in, e.g. 'data'.
     :param file_extension: The file extension expected to open. can be `.<extension>` or  `<extension>` or `None`.
         If None is provided then the extension must included in the file name when calling the returned function
     :return: A function which creates a context manager around an opened file
     """
 
-    # Add the dot to the extension. We expect people to not add one, but its easier to add then remove
-    if file_extension is not None and not file_extension.startswith('.'):
-        data_extension = '.'+file_extension
-    root = pkg.files(anchor)
+    file_extension = _normalize_extension(file_extension)
 
     @contextmanager
     def _open_file(
@@ -72,9 +252,19 @@ def make_file_opener(
             Returns:
                 A context manger for opening files.
             """
-            file_name = f'{name}{data_extension}' if data_extension is not None else f'{name}'
-            path = root.joinpath(*sub_directories).joinpath(file_name)
-            return path.open(mode, buffering, encoding, errors, newline, closefd, opener)
+            file_name = _with_extension(name, file_extension)
+            writing = any(c in mode for c in 'wax+')
+            if writing:
+                path = manifest.target(anchor, file_name, sub_directories)
+                path.parent.mkdir(parents = True, exist_ok = True)
+            else:
+                path = manifest.find(anchor, file_name, sub_directories)
+            try:
+                with open(path, mode, buffering, encoding, errors, newline, closefd, opener) as f:
+                    yield f
+            finally:
+                if writing:
+                    manifest.written(path)
 
     return _open_file
 
@@ -83,14 +273,12 @@ def make_path_finder(anchor: Anchor, file_extension: str | None = None) -> Calla
     """
     Create a reusable function for finding paths.
 
-    :param anchor: The location to start at, as a module from `import <x>`.
+    :param anchor: The folder to look in, e.g. 'fonts'.
     :param file_extension: The file extension expected to find. can be `.<extension>` or  `<extension>` or `None`.
         If None is provided then the extension must included in the file name when calling the returned function
     """
 
-    if file_extension is not None and not file_extension.startswith('.'):
-        file_extension = '.' + file_extension
-    root = pkg.files(anchor)
+    file_extension = _normalize_extension(file_extension)
 
     def _find_path(name: str, sub_directories: tuple[str, ...] = ()) -> Path:
         """
@@ -104,31 +292,28 @@ def make_path_finder(anchor: Anchor, file_extension: str | None = None) -> Calla
             sub_directory: Any sub directories from the root WITHOUT seperators ('<subdir1>', '<subdir2>')
 
         Returns:
-            A pathlib Path object with the absolute path to the specified file
+            A pathlib Path object with the absolute path to the specified file.
+            It stays valid for as long as the program runs.
         """
-        file_name = f'{name}{file_extension}' if file_extension is not None else name
-        path = root.joinpath(*sub_directories).joinpath(file_name)
-        with pkg.as_file(path) as p:
-             return p
+        return manifest.find(anchor, _with_extension(name, file_extension), sub_directories)
 
     return _find_path
 
 
-def make_string_opener(anchor: Anchor, file_extension: str='txt', _encoding: float = 'utf-8') -> Callable[[str, tuple[str, ...], str], str]:
+def make_string_opener(anchor: Anchor, file_extension: str='txt', _encoding: str = 'utf-8') -> Callable[[str, tuple[str, ...], str], str]:
     """
     Create a reusable function for retrieving the text from files of a particular type.
+    Reads are memoized, so asking for the same file again doesn't touch the disk.
 
     Args:
-        anchor: The location to open at, as a module from `import <x>`.
+        anchor: The folder to open in, e.g. 'shaders'.
         file_extension: The file extension expected to open. can be `.<extension>` or just `<extension>`. Defaults to 'txt'
         _encoding: The default text encoding to use. Defaults to 'utf-8'.
 
     Returns:
         The reusable read string function
     """
-    if not file_extension.startswith('.'):
-         file_extension = '.' + file_extension
-    root = pkg.files(anchor)
+    file_extension = _normalize_extension(file_extension)
 
     def _read_string(name: str, sub_directories: tuple[str, ...] = (), encoding: str = _encoding) -> str:
         """
@@ -143,30 +328,27 @@ def make_string_opener(anchor: Anchor, file_extension: str='txt', _encoding: flo
         Returns:
             The entire file as a single string.
         """
-        file_name = f'{name}{file_extension}'
-        path = root.joinpath(*sub_directories).joinpath(file_name)
-        return path.read_text(encoding)
+        return manifest.read_text(anchor, _with_extension(name, file_extension), tuple(sub_directories), encoding)
 
     return _read_string
 
-def make_binary_opener(anchor: Anchor, file_extension: str) -> Callable[[str, tuple[str, ...]], bytes]:
+def make_binary_opener(anchor: Anchor, file_extension: str) -> Callable[[str, tuple[str, ...]], Buffer]:
     """
     Create a reusable function for retrieving the binary from files of a particular type.
+    Reads are memoized, and big files are memory-mapped rather than read.
 
     Args:
-        anchor: The location to open at, as a module from `import <x>`.
+        anchor: The folder to open in, e.g. 'fonts'.
         file_extension: The file extension expected to open. can be `.<extension>` or just `<extension>`
 
     Returns:
         The reusable read bytes function
     """
-    if not file_extension.starts_with('.'):
-         file_extension = '.' + file_extension
-    root = pkg.files(anchor)
+    file_extension = _normalize_extension(file_extension)
 
-    def _read_bytes(name: str, sub_directories: tuple[str, ...] = ()) -> bytes:
+    def _read_bytes(name: str, sub_directories: tuple[str, ...] = ()) -> Buffer:
         """
-        Read the entire contents of the provided file and return it as bytes.
+        Read the entire contents of the provided file.
         Uses the file extension provided at creation.
 
         Args:
@@ -174,10 +356,20 @@ def make_binary_opener(anchor: Anchor, file_extension: str) -> Callable[[str, tu
             sub_directories: Any sub directories from the root WITHOUT seperators ('<subdir1>', '<subdir2>')
 
         Returns:
-            The entire file as bytes
+            The entire file, as `bytes` or a read only `memoryview` (see `Manifest.read_bytes`).
         """
-        file_name = f'{name}{file_extension}'
-        path = root.joinpath(*sub_directories).joinpath(file_name)
-        return path.read_binary()
+        return manifest.read_bytes(anchor, _with_extension(name, file_extension), tuple(sub_directories))
 
     return _read_bytes
+
+
+if __name__ == '__main__':
+    # python -m resources.filefactory <out> packs the resources into a bundle
+    out = Path(sys.argv[1]) if len(sys.argv) > 1 else Path(__file__).parent / BUNDLE_NAME
+    tmp = out.with_name(out.name + ".tmp")
+    try:
+        tmp.write_bytes(pack_bundle())
+        tmp.replace(out)
+    except BaseException:
+        tmp.unlink(missing_ok = True)
+        raise
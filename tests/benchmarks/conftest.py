@@ -0,0 +1,31 @@
+"""Shared fixtures for the benchmarks.
+
+Nothing here opens a window; only the pure-Python and numpy paths are timed.
+Save a baseline with ``pytest tests/benchmarks --benchmark-save=baseline`` and
+check against it with ``--benchmark-compare --benchmark-compare-fail=mean:25%``.
+"""
+from pathlib import Path
+
+import pytest
+
+from acradio.core.music import Requirements, State
+from tests.benchmarks.synthetic import make_library, make_states
+
+LIBRARY_SIZES = [10, 1_000, 100_000]
+
+
+def pytest_ignore_collect(collection_path: Path, config: pytest.Config) -> bool | None:
+    # Without pytest-benchmark there's no benchmark fixture, so plain pytest leaves these out
+    if not config.pluginmanager.hasplugin("benchmark") and collection_path.name.startswith("test_"):
+        return True
+    return None
+
+
+@pytest.fixture(scope = "session", params = LIBRARY_SIZES, ids = lambda size: f"{size}_tracks")
+def library(request: pytest.FixtureRequest) -> dict[str, Requirements]:
+    return make_library(request.param)
+
+
+@pytest.fixture(scope = "session")
+def states() -> list[State]:
+    return make_states(100)
@@ -0,0 +1,37 @@
+"""Synthetic track libraries and clock states for the benchmarks."""
+import random
+
+from acradio.core.music import Requirements, State, parse_tracks
+
+WEATHERS = ["sunny", "cloudy", "rainy", "snowy", "thunder", "foggy"]
+
+
+def make_library(size: int, seed: int = 0) -> dict[str, Requirements]:
+    """A synthetic settings.json music table, shaped like a real one.
+
+    Every track has a time; some also pin a month, day or weather, and a few
+    get a priority. There's always an unconditional midnight track so every
+    lookup finds something.
+    """
+    rng = random.Random(seed)
+    music: dict[str, Requirements] = {"default": {"time": 0}}
+    for i in range(size - 1):
+        req: Requirements = {"time": rng.randrange(24) * 100 + rng.choice((0, 0, 0, 30))}
+        if rng.random() < 0.3:
+            req["month"] = rng.randrange(1, 13)
+        if rng.random() < 0.1:
+            req["day"] = rng.randrange(1, 29)
+        if rng.random() < 0.5:
+            req["weather"] = rng.choice(WEATHERS)
+        if rng.random() < 0.05:
+            req["priority"] = rng.randrange(1, 4)
+        music[f"track{i:06}"] = req
+    return parse_tracks(music)
+
+
+def make_states(count: int, seed: int = 1) -> list[State]:
+    rng = random.Random(seed)
+    return [
+        State(rng.randrange(1, 13), rng.randrange(1, 29), rng.randrange(24), rng.randrange(60), rng.choice(WEATHERS))
+        for _ in range(count)
+    ]
@@ -0,0 +1,17 @@
+from pytest_benchmark.fixture import BenchmarkFixture
+
+from acradio.core.background import (
+    build_sky_timeline,
+    compile_stopped_gradient,
+    compiled_gradients,
+    gradients
+)
+
+
+def test_compile_stopped_gradients(benchmark: BenchmarkFixture) -> None:
+    """All 24 hourly gradients, as done once at import."""
+    benchmark(lambda: {hour: compile_stopped_gradient(gradient) for hour, gradient in gradients.items()})
+
+
+def test_build_sky_timeline(benchmark: BenchmarkFixture) -> None:
+    benchmark(build_sky_timeline, compiled_gradients)
@@ -0,0 +1,36 @@
+from typing import Literal
+
+import pytest
+from pytest_benchmark.fixture import BenchmarkFixture
+
+from acradio.lib.fader import Fader
+
+# (phase, local time) for a fader activated at 1 with 1s fade in, 1s hold and 1s fade out
+PHASES = [
+    ("before", 0.5),
+    ("fade_in", 1.5),
+    ("hold", 2.5),
+    ("fade_out", 3.5),
+    ("after", 4.5)
+]
+
+
+@pytest.mark.parametrize(("phase", "local_time"), PHASES, ids = [phase for phase, _ in PHASES])
+@pytest.mark.parametrize("wrap", [False, int], ids = ["float", "int"])
+def test_fader_value(benchmark: BenchmarkFixture, phase: str, local_time: float, wrap: type[int] | Literal[False]) -> None:
+    fader = Fader(0, 255, 1, 1, 1, wrap)
+    fader.activate(1)
+    fader.update(local_time)
+
+    benchmark(lambda: fader.value)
+
+
+def test_fader_update(benchmark: BenchmarkFixture) -> None:
+    fader = Fader(0, 255, 1, 1, 1, int)
+    fader.activate(0)
+
+    def run() -> float:
+        fader.update(1 / 60)
+        return fader.value
+
+    benchmark(run)
@@ -0,0 +1,39 @@
+import json
+from pathlib import Path
+
+import pytest
+from pytest_benchmark.fixture import BenchmarkFixture
+
+from acradio.core.music import Requirements, State, TrackIndex, choose_track, load_tracks
+from tests.benchmarks.synthetic import make_library
+
+
+def test_choose_track(benchmark: BenchmarkFixture, library: dict[str, Requirements], states: list[State]) -> None:
+    """100 lookups per round, so the number is per-100-minute-ticks."""
+    index = TrackIndex(library)
+
+    def run() -> None:
+        for state in states:
+            choose_track(state, index)
+
+    benchmark(run)
+
+
+def test_build_track_index(benchmark: BenchmarkFixture, library: dict[str, Requirements]) -> None:
+    benchmark(TrackIndex, library)
+
+
+@pytest.fixture(params = [1_000, 100_000], ids = lambda size: f"{size}_tracks")
+def settings_file(request: pytest.FixtureRequest, tmp_path: Path) -> Path:
+    music = make_library(request.param)
+    # Drop the filled-in priorities so load_tracks has something to do
+    for req in music.values():
+        if req["priority"] == 0:
+            del req["priority"]
+    path = tmp_path / "settings.json"
+    path.write_text(json.dumps({"location": "Nowhere", "music": music}))
+    return path
+
+
+def test_load_tracks(benchmark: BenchmarkFixture, settings_file: Path) -> None:
+    benchmark(load_tracks, settings_file)
@@ -0,0 +1,59 @@
+import pytest
+from pytest_benchmark.fixture import BenchmarkFixture
+
+from acradio.lib.fader import Fader
+from acradio.lib.timeline import Timeline
+
+ENVELOPE_COUNTS = [10, 100, 1_000]
+
+
+def staggered(count: int) -> list[tuple[float, float, float, float, float]]:
+    """`count` envelopes spread over every phase, and long enough that none finish mid-benchmark."""
+    return [(0, 255, 1 + i % 7, 1e6, 1 + i % 5) for i in range(count)]
+
+
+@pytest.mark.parametrize("count", ENVELOPE_COUNTS, ids = lambda count: f"{count}_envelopes")
+def test_timeline_update(benchmark: BenchmarkFixture, count: int) -> None:
+    """One frame: advance every envelope and read every value."""
+    timeline = Timeline()
+    envelopes = [timeline.envelope(*params) for params in staggered(count)]
+    for i, envelope in enumerate(envelopes):
+        envelope.activate(-(i % 11))
+
+    def run() -> None:
+        timeline.update(1 / 60)
+        for envelope in envelopes:
+            _ = envelope.value
+
+    benchmark(run)
+
+
+@pytest.mark.parametrize("count", ENVELOPE_COUNTS, ids = lambda count: f"{count}_envelopes")
+def test_fader_loop_update(benchmark: BenchmarkFixture, count: int) -> None:
+    """The same frame done the old way, one `Fader` at a time, for comparison."""
+    faders = [Fader(*params) for params in staggered(count)]
+    for i, fader in enumerate(faders):
+        fader.activate(-(i % 11))
+
+    def run() -> None:
+        for fader in faders:
+            fader.update(1 / 60)
+            _ = fader.value
+
+    benchmark(run)
+
+
+def test_timeline_churn(benchmark: BenchmarkFixture) -> None:
+    """Short envelopes starting and finishing every frame, so adds and drops are in the number."""
+    timeline = Timeline()
+    envelopes = [timeline.envelope(0, 1, 0.05, 0, 0.05) for _ in range(200)]
+    frame = 0
+
+    def run() -> None:
+        nonlocal frame
+        for envelope in envelopes[frame % 10::10]:
+            envelope.activate()
+        timeline.update(1 / 60)
+        frame += 1
+
+    benchmark(run)
@@ -0,0 +1,19 @@
+from pytest_benchmark.fixture import BenchmarkFixture
+
+from acradio.lib.utils import clamp, map_range
+
+
+def test_map_range_float(benchmark: BenchmarkFixture) -> None:
+    benchmark(map_range, 0.25, 0.0, 1.0, 0.0, 255.0)
+
+
+def test_map_range_int(benchmark: BenchmarkFixture) -> None:
+    benchmark(map_range, 3, 0, 10, 0, 255)
+
+
+def test_clamp_inside(benchmark: BenchmarkFixture) -> None:
+    benchmark(clamp, 0.0, 0.5, 1.0)
+
+
+def test_clamp_outside(benchmark: BenchmarkFixture) -> None:
+    benchmark(clamp, 0.0, 1.5, 1.0)
@@ -0,0 +1,22 @@
+"""pytest setup shared by every test.
+
+pytest-benchmark's options are set here rather than in pyproject's ``addopts``,
+so plain pytest still runs the tests when the plugin isn't installed. Anything
+given on the command line wins.
+"""
+import pytest
+
+
+def _given(config: pytest.Config, flag: str) -> bool:
+    return any(arg == flag or arg.startswith(flag + "=") for arg in config.invocation_params.args)
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    # pytest-benchmark reads these in its own configure, which runs last
+    if not config.pluginmanager.hasplugin("benchmark"):
+        return
+    if not _given(config, "--benchmark-storage"):
+        # Baselines are checked in; see tests/benchmarks/conftest.py
+        config.option.benchmark_storage = str(config.rootpath / "tests" / "benchmarks" / "baselines")
+    if not _given(config, "--benchmark-columns"):
+        config.option.benchmark_columns = ["min", "median", "mean", "stddev", "rounds"]
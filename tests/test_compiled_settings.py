@@ -0,0 +1,91 @@
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+from acradio.core.compiled_settings import _HEADER, _read_compiled, compile_settings, load_settings
+from acradio.core.music import FileJSON, parse_tracks
+
+
+def settings_json(**music: dict) -> FileJSON:
+    return {"location": "Nowhere", "crossfade": 1.5, "music": music}
+
+
+@pytest.fixture
+def paths(tmp_path: Path) -> tuple[Path, Path]:
+    return tmp_path / "settings.json", tmp_path / "settings.bin"
+
+
+def write(path: Path, settings: FileJSON) -> bytes:
+    source = json.dumps(settings).encode()
+    path.write_bytes(source)
+    return source
+
+
+def test_round_trip(paths: tuple[Path, Path]) -> None:
+    source_path, cache_path = paths
+    settings = settings_json(
+        default = {"time": 0},
+        morning = {"time": 800, "priority": 2},
+        winter = {"month": 12, "day": 25, "weather": "snowy", "time": 1930},
+        weird = {"weather": "rainy ☔"}
+    )
+    write(source_path, settings)
+
+    expected = {**settings, "music": parse_tracks(json.loads(json.dumps(settings["music"])))}
+    assert load_settings(source_path, cache_path) == expected
+    assert cache_path.exists()
+    assert _read_compiled(source_path, cache_path) == expected
+
+
+def test_touch_without_change_keeps_the_cache(paths: tuple[Path, Path]) -> None:
+    source_path, cache_path = paths
+    write(source_path, settings_json(default = {"time": 0}))
+    load_settings(source_path, cache_path)
+
+    mtime_ns = source_path.stat().st_mtime_ns + 5_000_000_000
+    os.utime(source_path, ns = (mtime_ns, mtime_ns))
+    assert _read_compiled(source_path, cache_path) is not None
+    # The hash matched, so the header now carries the new mtime and the next read skips hashing
+    assert _HEADER.unpack_from(cache_path.read_bytes())[2] == mtime_ns
+
+
+def test_change_with_same_size_misses(paths: tuple[Path, Path]) -> None:
+    source_path, cache_path = paths
+    write(source_path, settings_json(default = {"time": 100}))
+    load_settings(source_path, cache_path)
+
+    mtime_ns = source_path.stat().st_mtime_ns
+    write(source_path, settings_json(default = {"time": 200}))
+    os.utime(source_path, ns = (mtime_ns + 1, mtime_ns + 1))
+    assert _read_compiled(source_path, cache_path) is None
+    assert load_settings(source_path, cache_path)["music"]["default"]["time"] == 200
+
+
+@pytest.mark.parametrize("req", [
+    pytest.param({"time": 8.5}, id = "float"),
+    pytest.param({"month": 70_000}, id = "month out of range"),
+    pytest.param({"priority": 2 ** 40}, id = "priority out of range"),
+    pytest.param({"time": 0, "volume": 3}, id = "unknown key"),
+    pytest.param({"weather": 3}, id = "weather not a string")
+])
+def test_unrepresentable_tables_fall_back_to_json(paths: tuple[Path, Path], req: dict) -> None:
+    source_path, cache_path = paths
+    settings = settings_json(track = req)
+    source = write(source_path, settings)
+
+    parsed = json.loads(source)
+    parse_tracks(parsed["music"])
+    assert compile_settings(parsed, source, 0) is None
+    assert load_settings(source_path, cache_path)["music"]["track"] == parse_tracks(settings["music"])["track"]
+    assert not cache_path.exists()
+
+
+def test_bools_keep_their_type(paths: tuple[Path, Path]) -> None:
+    source_path, cache_path = paths
+    write(source_path, settings_json(track = {"time": 0, "priority": True}))
+
+    for _ in range(2):
+        priority = load_settings(source_path, cache_path)["music"]["track"]["priority"]
+        assert priority is True
@@ -0,0 +1,46 @@
+from dataclasses import asdict
+
+import pytest
+
+from acradio.core.music import Requirements, State, TrackIndex
+from tests.benchmarks.synthetic import make_library, make_states
+
+
+def linear_lookup(tracks: dict[str, Requirements], state: State) -> str | None:
+    """The original `choose_track`: filter, drop later times, stable sort on (time, priority), take the last."""
+    state_dict = asdict(state)
+    possible = {
+        track: req
+        for track, req in tracks.items()
+        if all(state_dict[r] == v for r, v in req.items() if r not in ("time", "priority"))
+    }
+    possible = {t: r for t, r in possible.items() if r.get("time", 0) <= state.time}
+    ordered = sorted(possible.items(), key = lambda item: (item[1].get("time", 0), item[1]["priority"]))
+    return ordered[-1][0] if ordered else None
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_lookup_matches_linear_scan(seed: int) -> None:
+    tracks = make_library(200, seed)
+    index = TrackIndex(tracks)
+    for state in make_states(200, seed + 1000):
+        assert index.lookup(state) == linear_lookup(tracks, state), state
+
+
+def test_ties_go_to_the_last_track() -> None:
+    tracks: dict[str, Requirements] = {
+        "first": {"time": 800, "priority": 1},
+        "second": {"time": 800, "priority": 1},
+        "quieter": {"time": 800, "priority": 0},
+        "sunny": {"time": 800, "weather": "sunny", "priority": 1}
+    }
+    index = TrackIndex(tracks)
+    assert index.lookup(State(1, 1, 9, 0, "rainy")) == "second" == linear_lookup(tracks, State(1, 1, 9, 0, "rainy"))
+    assert index.lookup(State(1, 1, 9, 0, "sunny")) == "sunny" == linear_lookup(tracks, State(1, 1, 9, 0, "sunny"))
+
+
+def test_nothing_matches() -> None:
+    tracks: dict[str, Requirements] = {"late": {"time": 2300, "priority": 0}, "june": {"month": 6, "priority": 0}}
+    state = State(1, 1, 9, 0, "sunny")
+    assert TrackIndex(tracks).lookup(state) is None
+    assert linear_lookup(tracks, state) is None
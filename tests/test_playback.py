@@ -0,0 +1,57 @@
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from acradio.core.playback import CACHE_AFTER_PLAYS, TrackPlayer
+
+from .test_transcode import write_tone
+
+
+class BlockingCache:
+    """A decoded audio cache that never has anything, and whose decodes wait for `release`."""
+    budget = 1 << 30
+
+    def __init__(self) -> None:
+        self.release = threading.Event()
+        self.decoding = threading.Event()
+
+    def __contains__(self, track: Path) -> bool:
+        return False
+
+    def get(self, track: Path) -> None:
+        return None
+
+    def decode(self, track: Path, size: int) -> None:
+        self.decoding.set()
+        self.release.wait(5)
+
+
+@pytest.fixture
+def tracks(tmp_path: Path) -> list[Path]:
+    # Not named .wav, so they stream through pyglet's decoders rather than being memory-mapped
+    paths = [tmp_path / "a.tone", tmp_path / "b.tone"]
+    for path in paths:
+        write_tone(path)
+    return paths
+
+
+def test_prerolls_do_not_wait_for_cache_fills(tracks: list[Path]) -> None:
+    cache = BlockingCache()
+    player = TrackPlayer(crossfade = 0, cache = cache)
+    try:
+        first, second = tracks
+        for _ in range(CACHE_AFTER_PLAYS):
+            player.play(first)
+            player.play(second)
+        assert cache.decoding.wait(5)
+
+        player.preroll(first)
+        start = time.monotonic()
+        player.play(first)
+        assert time.monotonic() - start < 1
+        assert player.track == first
+    finally:
+        cache.release.set()
+        player.close()
@@ -0,0 +1,83 @@
+import json
+import struct
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+
+from acradio.lib.program_cache import ProgramCache
+
+VERTEX_SHADER = """#version 330
+in vec2 in_vert;
+in vec2 in_uv;
+out vec2 uv;
+uniform float scale;
+void main() {
+    uv = in_uv;
+    gl_Position = vec4(in_vert * scale, 0.0, 1.0);
+}
+"""
+FRAGMENT_SHADER = """#version 330
+in vec2 uv;
+out vec4 color;
+uniform sampler2D tex;
+void main() {
+    color = texture(tex, uv);
+}
+"""
+TRANSFORM_SHADER = """#version 330
+in float x;
+out float y;
+void main() {
+    y = x * 2.0;
+}
+"""
+
+
+@pytest.fixture(scope = "module")
+def ctx() -> Iterator[object]:
+    arcade = pytest.importorskip("arcade")
+    try:
+        window = arcade.Window(64, 64, visible = False)
+    except Exception as e:  # noqa: BLE001
+        pytest.skip(f"no OpenGL context: {e}")
+    if not ProgramCache()._use_binaries(window.ctx):  # noqa: SLF001
+        window.close()
+        pytest.skip("no program binary support")
+    yield window.ctx
+    window.close()
+
+
+def compile_both(cache: ProgramCache, ctx: object) -> None:
+    cache.program(ctx, vertex_shader = VERTEX_SHADER, fragment_shader = FRAGMENT_SHADER)
+    cache.program(ctx, vertex_shader = TRANSFORM_SHADER)
+
+
+def test_binaries_load_in_a_new_cache(ctx: object, tmp_path: Path) -> None:
+    compile_both(ProgramCache(tmp_path), ctx)
+    cache = ProgramCache(tmp_path)
+    program = cache.program(ctx, vertex_shader = VERTEX_SHADER, fragment_shader = FRAGMENT_SHADER)
+    transform = cache.program(ctx, vertex_shader = TRANSFORM_SHADER)
+
+    assert (cache.loaded, cache.compiled) == (2, 0)
+    assert [attribute.name for attribute in program.attributes] == ["in_vert", "in_uv"]
+    program["scale"] = 2.0
+    assert program["scale"] == 2.0
+    assert transform.varyings == ["y"]
+
+
+def test_damaged_binaries_compile_instead(ctx: object, tmp_path: Path) -> None:
+    compile_both(ProgramCache(tmp_path), ctx)
+    truncated, mismatched = sorted(tmp_path.iterdir())
+    truncated.write_bytes(truncated.read_bytes()[:40])
+    data = mismatched.read_bytes()
+    magic, binary_format, size = struct.unpack_from("<4sII", data)
+    interface = json.loads(data[12:12 + size])
+    interface["attributes"] = []
+    changed = json.dumps(interface, sort_keys = True).encode()
+    mismatched.write_bytes(struct.pack("<4sII", magic, binary_format, len(changed)) + changed + data[12 + size:])
+
+    cache = ProgramCache(tmp_path)
+    compile_both(cache, ctx)
+    assert (cache.loaded, cache.compiled) == (0, 2)
+    assert len(list(tmp_path.iterdir())) == 2
@@ -0,0 +1,44 @@
+import pytest
+
+import resources
+
+
+class FakeContext:
+    """Stands in for an ArcadeContext, counting the programs it's asked to link."""
+    def __init__(self) -> None:
+        self.linked: list[dict[str, object]] = []
+
+    def program(self, **kwargs: object) -> object:
+        self.linked.append(kwargs)
+        return object()
+
+
+@pytest.fixture(autouse = True)
+def shaders(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(resources, "read_shader", lambda name, sub_directories = (): f"// {name}")
+
+
+def test_programs_are_linked_once_per_context() -> None:
+    ctx = FakeContext()
+    program = resources.load_program(ctx, vertex_shader = "blit_vs", fragment_shader = "blit_fs", defines = {"N": 4})
+
+    assert resources.load_program(ctx, vertex_shader = "blit_vs", fragment_shader = "blit_fs", defines = {"N": "4"}) is program
+    assert len(ctx.linked) == 1
+    assert resources.load_program(ctx, vertex_shader = "blit_vs", fragment_shader = "blit_fs", defines = {"N": 8}) is not program
+    assert resources.load_program(FakeContext(), vertex_shader = "blit_vs", fragment_shader = "blit_fs", defines = {"N": 4}) \
+        is not program
+    assert len(ctx.linked) == 2
+
+
+def test_make_program_builds_on_a_miss() -> None:
+    ctx = FakeContext()
+    built = []
+
+    def make_program(**kwargs: object) -> object:
+        built.append(kwargs["vertex_shader"])
+        return object()
+
+    program = resources.load_program(ctx, vertex_shader = "sky_vs", make_program = make_program)
+    assert resources.load_program(ctx, vertex_shader = "sky_vs", make_program = make_program) is program
+    assert built == ["// sky_vs"]
+    assert ctx.linked == []
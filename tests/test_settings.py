@@ -0,0 +1,100 @@
+import json
+import os
+import threading
+import time
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+
+from acradio.core.library import LibraryIndex, ScanResult, TrackInfo
+from acradio.core.settings import SettingsService
+from acradio.core.transcode import PCMCache
+
+
+class BlockingLibrary(LibraryIndex):
+    """A library whose scan waits for `release`, then finds exactly `files`."""
+    def __init__(self, root: Path, path: Path, files: list[str]) -> None:
+        super().__init__(root, path)
+        self.files = files
+        self.release = threading.Event()
+        self.scans = 0
+
+    def scan(self, workers: int | None = None) -> ScanResult:
+        self.scans += 1
+        self.release.wait(5)
+        self.entries = {name: TrackInfo(1, 1, 1.0, 44100, 2, 16, "wave") for name in self.files}
+        self.scanned = True
+        return ScanResult(len(self.files), 0, 0, 0)
+
+
+def wait_for_check(service: SettingsService, timeout: float = 5) -> None:
+    deadline = time.monotonic() + timeout
+    while not service.check():
+        if time.monotonic() > deadline:
+            raise TimeoutError
+        time.sleep(0.005)
+
+
+@pytest.fixture
+def library(tmp_path: Path) -> Iterator[BlockingLibrary]:
+    library = BlockingLibrary(tmp_path / "music", tmp_path / "library.json", ["here.mp3"])
+    yield library
+    library.release.set()
+
+
+@pytest.fixture
+def service(tmp_path: Path, library: BlockingLibrary) -> SettingsService:
+    path = tmp_path / "settings.json"
+    path.write_text(json.dumps({"location": "Home", "music": {"here": {"time": 0}, "gone": {"time": 800}}}))
+    return SettingsService(path, tmp_path / "settings.bin", library = library)
+
+
+def test_first_snapshot_does_not_wait_for_the_scan(service: SettingsService, library: BlockingLibrary) -> None:
+    snapshot = service.snapshot
+    assert snapshot.missing_tracks == ()
+    assert not service.check()
+
+    published = []
+    service.subscribe(lambda old, new: published.append((old, new)))
+    library.release.set()
+    wait_for_check(service)
+
+    assert published == [(snapshot, service.snapshot)]
+    assert service.snapshot.missing_tracks == ("gone",)
+    assert library.scans == 1
+
+
+def test_starts_from_the_saved_index(service: SettingsService, library: BlockingLibrary) -> None:
+    library.entries = {"here.mp3": TrackInfo(1, 1)}
+    library.save()
+    library.entries = {}
+
+    assert service.snapshot.missing_tracks == ("gone",)
+
+
+def test_edits_rescan(service: SettingsService, library: BlockingLibrary) -> None:
+    library.release.set()
+    _ = service.snapshot
+    wait_for_check(service)
+
+    service.path.write_text(json.dumps({"location": "Home", "music": {"here": {"time": 0}}}))
+    mtime_ns = service.snapshot.mtime_ns + 1_000_000_000
+    os.utime(service.path, ns = (mtime_ns, mtime_ns))
+    assert service.check()
+    assert service.snapshot.missing_tracks == ()
+    wait_for_check(service)
+    assert library.scans == 2
+
+
+def test_transcoded_copies_find_their_source(tmp_path: Path) -> None:
+    pcm_cache = PCMCache(tmp_path / "music", tmp_path / "pcm")
+    library = LibraryIndex(pcm_cache.root, tmp_path / "library.json", source = pcm_cache.source)
+    library.entries = {"album/song.mp3": TrackInfo(1, 1, 2.5)}
+
+    copy = pcm_cache.cached_path("album/song.mp3")
+    assert pcm_cache.source(copy) == pcm_cache.root / "album" / "song.mp3"
+    assert library.duration(copy) == 2.5
+    assert library.duration(pcm_cache.root / "album" / "song.mp3") == 2.5
+    assert "album/song.mp3" in library
+    assert library.get(tmp_path / "elsewhere.wav") is None
@@ -0,0 +1,27 @@
+import ctypes
+
+import pytest
+from pyglet.media import Source
+from pyglet.media.synthesis import Sine
+
+from acradio.lib.streaming import BoundedStream
+
+
+def read_all(source: Source, num_bytes: int) -> bytes:
+    out = bytearray()
+    while (data := source.get_audio_data(num_bytes)) is not None:
+        out += ctypes.string_at(data.pointer, data.length)
+    return bytes(out)
+
+
+@pytest.mark.parametrize("max_chunk_bytes", [1, 1001, 4096])
+def test_chunks_stay_under_the_cap(max_chunk_bytes: int) -> None:
+    expected = read_all(Sine(0.5), 1 << 20)
+    stream = BoundedStream(Sine(0.5), max_chunk_bytes)
+    stream.prime()
+
+    assert read_all(stream, 1 << 20) == expected
+    assert 0 < stream.peak_chunk_bytes <= stream.max_chunk_bytes
+    assert stream.max_chunk_bytes <= max(max_chunk_bytes, stream.audio_format.bytes_per_frame)
+    assert stream.max_chunk_bytes % stream.audio_format.bytes_per_frame == 0
+    assert stream.decoded_bytes == len(expected)
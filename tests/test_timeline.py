@@ -0,0 +1,56 @@
+import random
+
+import pytest
+
+from acradio.lib.fader import Fader
+from acradio.lib.timeline import Timeline
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_envelopes_match_faders(seed: int) -> None:
+    """Random activations, stops and parameter changes read the same through a timeline as through faders."""
+    rng = random.Random(seed)
+    timeline = Timeline(2)
+    pairs = []
+    for _ in range(12):
+        params = (rng.uniform(-5, 5), rng.uniform(5, 10), rng.choice([0, rng.uniform(0, 2)]),
+                  rng.uniform(0, 2), rng.choice([0, rng.uniform(0, 2)]))
+        pairs.append((timeline.envelope(*params), Fader(*params)))
+
+    for _ in range(300):
+        delta_time = rng.uniform(0, 0.1)
+        timeline.update(delta_time)
+        for envelope, fader in pairs:
+            fader.update(delta_time)
+            roll = rng.random()
+            if roll < 0.03:
+                envelope.activate()
+                fader.activate(fader.local_time)
+            elif roll < 0.04:
+                envelope.stop()
+                fader.activate(float("-inf"))
+            elif roll < 0.05 and envelope.active:
+                hold = rng.uniform(0, 2)
+                envelope.hold = fader.hold = hold
+        assert len(timeline) == sum(envelope.active for envelope, _ in pairs)
+        for envelope, fader in pairs:
+            assert envelope.value == pytest.approx(fader.value, abs = 1e-9)
+
+
+def test_finished_envelopes_leave() -> None:
+    timeline = Timeline(1)
+    short = timeline.envelope(0, 1, 0.5, 0, 0.5)
+    long = timeline.envelope(0, 255, 1, 10, 1, int)
+    short.activate()
+    long.activate()
+    assert len(timeline) == 2
+
+    timeline.update(2)
+    assert not short.active
+    assert short.value == 0
+    assert long.slot == 0
+    assert long.value == 255
+
+    timeline.clear()
+    assert len(timeline) == 0
+    assert long.value == 0
@@ -0,0 +1,79 @@
+import wave
+from pathlib import Path
+
+import pyglet.media
+import pytest
+
+from acradio.core.transcode import PCMCache, transcode
+
+MTIME_NS = 1_700_000_000_000_000_000
+
+
+def write_tone(path: Path, frames: int = 4410) -> bytes:
+    data = bytes(range(256)) * (frames * 4 // 256) + bytes(frames * 4 % 256)
+    with wave.open(str(path), "wb") as f:
+        f.setnchannels(2)
+        f.setsampwidth(2)
+        f.setframerate(44100)
+        f.writeframes(data)
+    return data
+
+
+def test_transcodes_and_stamps(tmp_path: Path) -> None:
+    data = write_tone(tmp_path / "tone.wav")
+    destination = tmp_path / "pcm" / "tone.wav.wav"
+
+    assert transcode(str(tmp_path / "tone.wav"), str(destination), MTIME_NS)
+    assert destination.stat().st_mtime_ns == MTIME_NS
+    with wave.open(str(destination), "rb") as f:
+        assert (f.getnchannels(), f.getsampwidth(), f.getframerate()) == (2, 2, 44100)
+        assert f.readframes(f.getnframes()) == data
+    assert list(destination.parent.iterdir()) == [destination]
+
+
+def test_undecodable_files_fail(tmp_path: Path) -> None:
+    (tmp_path / "bad.mp3").write_bytes(b"not audio at all" * 64)
+    destination = tmp_path / "pcm" / "bad.mp3.wav"
+
+    assert not transcode(str(tmp_path / "bad.mp3"), str(destination), MTIME_NS)
+    assert not destination.exists()
+    assert not destination.with_suffix(".tmp").exists()
+
+
+def test_decoder_errors_leave_nothing_behind(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    write_tone(tmp_path / "tone.wav")
+    destination = tmp_path / "pcm" / "tone.wav.wav"
+    decoder = pyglet.media.load(str(tmp_path / "tone.wav"), streaming = True)
+    read = decoder.get_audio_data
+    reads = 0
+
+    def get_audio_data(num_bytes: int) -> object:
+        nonlocal reads
+        reads += 1
+        if reads > 1:
+            raise ValueError("corrupt frame")
+        return read(1024)
+
+    monkeypatch.setattr(decoder, "get_audio_data", get_audio_data)
+    monkeypatch.setattr(pyglet.media, "load", lambda *args, **kwargs: decoder)
+
+    assert not transcode(str(tmp_path / "tone.wav"), str(destination), MTIME_NS)
+    assert reads == 2
+    assert list(destination.parent.iterdir()) == []
+
+
+def test_builds_stop_at_the_budget(tmp_path: Path) -> None:
+    (tmp_path / "music").mkdir()
+    for name in ("a", "b", "c", "d"):
+        write_tone(tmp_path / "music" / f"{name}.wav")
+    pcm_cache = PCMCache(tmp_path / "music", tmp_path / "pcm")
+    # Each copy is a little under 18 KB, so the second one reaches it
+    budget = 20_000
+
+    result = pcm_cache.build(1, budget = budget)
+    assert (result.transcoded, result.deferred) == (2, 2)
+
+    # A copy already handed to the worker may still land, but nothing new starts
+    result = pcm_cache.build(1, budget = budget)
+    assert result.transcoded == 0
+    assert result.skipped + result.deferred == 4
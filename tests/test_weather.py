@@ -0,0 +1,94 @@
+import json
+import time
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+
+from acradio.core.weather import StubProvider, Weather, WeatherCache, WeatherService
+
+
+def wait_for(service: WeatherService, timeout: float = 5) -> Weather | None:
+    """Poll like the render loop does until a result arrives or the fetch in flight ends without one."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        weather = service.poll()
+        if weather is not None or not service.busy:
+            return weather if weather is not None else service.poll()
+        time.sleep(0.005)
+    raise TimeoutError
+
+
+@pytest.fixture
+def cache(tmp_path: Path) -> WeatherCache:
+    return WeatherCache(tmp_path / "weather_cache.json", ttl = 600)
+
+
+@pytest.fixture
+def provider() -> StubProvider:
+    return StubProvider(Weather.RAINY, places = {"Elsewhere": Weather.SNOWY})
+
+
+@pytest.fixture
+def service(provider: StubProvider, cache: WeatherCache) -> Iterator[WeatherService]:
+    service = WeatherService(provider, cache = cache)
+    yield service
+    service.close()
+
+
+def test_cache_freshness(service: WeatherService, cache: WeatherCache) -> None:
+    assert not service.load_cached("Home")
+
+    cache.store("Home", Weather.SNOWY)
+    assert service.load_cached("Home")
+    assert service.current == Weather.SNOWY
+
+    # Age the entry past the TTL; it's still served, but reported stale
+    entries = json.loads(cache.path.read_text())
+    entries["Home"]["timestamp"] -= cache.ttl + 1
+    cache.path.write_text(json.dumps(entries))
+    assert not service.load_cached("Home")
+    assert service.current == Weather.SNOWY
+
+
+def test_poll_hands_off_results(service: WeatherService, provider: StubProvider, cache: WeatherCache) -> None:
+    assert service.poll() is None
+
+    service.refresh("Home")
+    assert wait_for(service) == Weather.RAINY
+    assert service.current == Weather.RAINY
+    assert service.poll() is None
+    assert provider.calls == 1
+
+    cached = cache.get("Home")
+    assert cached is not None
+    assert cached[0] == Weather.RAINY
+
+
+def test_refresh_does_not_stack(service: WeatherService, provider: StubProvider) -> None:
+    provider.delay = 0.1
+    service.refresh("Home")
+    service.refresh("Home")
+    assert wait_for(service) == Weather.RAINY
+    assert provider.calls == 1
+
+
+def test_location_switch_cancels_the_old_fetch(service: WeatherService, provider: StubProvider) -> None:
+    provider.delay = 0.1
+    service.refresh("Home")
+    service.refresh("Elsewhere")
+    assert wait_for(service) == Weather.SNOWY
+    assert service.current == Weather.SNOWY
+    assert service.poll() is None
+
+
+def test_results_for_the_old_location_are_dropped(service: WeatherService, cache: WeatherCache) -> None:
+    cache.store("Elsewhere", Weather.SUNNY)
+    service.refresh("Home")
+    while service.busy:
+        time.sleep(0.005)
+
+    # Home's result is waiting in the queue when the location changes
+    assert service.load_cached("Elsewhere")
+    assert service.poll() is None
+    assert service.current == Weather.SUNNY